@@ -17,64 +17,213 @@ import os
 import sys
 import json
 import subprocess
-import difflib
 import argparse
-import re
+import functools
+import itertools
 import time
+import hashlib
+import pickle
+import tempfile
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+from cpu_utils import cpu_count
+from fast_difflib import difflib
+from json_utils import load_json
+
+# ijson streams just the word list out of a transcription file
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# rapidfuzz (C++ Levenshtein) aligns the gaps between anchors in _anchored_blocks
+# and scores fuzzy gap windows; pure-Python equivalents are used without it
+try:
+    from rapidfuzz import fuzz
+    from rapidfuzz.distance import Levenshtein
+except ImportError:
+    fuzz = None
+    Levenshtein = None
+
+# mutagen (header-only) and PyAV read container durations in-process;
+# ffprobe is used when neither is installed or both fail
+try:
+    import mutagen
+except ImportError:
+    mutagen = None
+
+try:
+    import av
+except ImportError:
+    av = None
+
 # Paths
 BASE_DIR = Path('/root/.openclaw/workspace/autotrim-desktop')
 TEST_DIR = BASE_DIR / 'test_data'
 REPORTS_DIR = TEST_DIR / 'reports'
 REPORTS_DIR.mkdir(exist_ok=True)
+TRANS_CACHE_DIR = REPORTS_DIR / '.trans_cache'
+SEG_CACHE_DIR = REPORTS_DIR / '.seg_cache'
+
+# Estimated gap-alignment work (sum of len(a) * len(b) over anchor gaps) above
+# which _anchored_blocks aligns the gaps in worker processes
+PARALLEL_GAP_MIN_WORK = 20_000_000
+
+# Max segments per ffmpeg filter graph; longer edits are rendered in batches.
+# Graph cost grows with segments x span, so small seeked batches are fastest.
+FILTER_BATCH_SIZE = 50
 
 def log(msg):
     print(f"[AutoTrim] {msg}", flush=True)
 
-def load_transcription(path):
-    """Load an AssemblyAI transcription JSON file."""
-    with open(path) as f:
-        data = json.load(f)
+def _load_cached(path, kind, parse):
+    """
+    Return parse(path), pickled under TRANS_CACHE_DIR and keyed by path, mtime,
+    size and kind, so re-running with different params skips the JSON parse.
+    """
+    path = Path(path)
+    st = path.stat()
+    key = hashlib.blake2b(
+        f"{path.resolve()}:{st.st_mtime_ns}:{st.st_size}:{kind}".encode(), digest_size=16
+    ).hexdigest()
+    cache_path = TRANS_CACHE_DIR / f'{key}.pkl'
+    
+    if cache_path.exists():
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    
+    data = parse(path)
+    
+    TRANS_CACHE_DIR.mkdir(exist_ok=True)
+    tmp_path = cache_path.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
     return data
 
+def _parse_words(path):
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            return list(ijson.items(f, 'words.item', use_float=True))
+    return get_words(load_json(path))
+
+def load_transcription(path):
+    """
+    Load an AssemblyAI transcription JSON file.
+    
+    The parsed result is cached on disk (see _load_cached).
+    """
+    return _load_cached(path, 'full', load_json)
+
+def load_words(path):
+    """
+    Load only the word list of an AssemblyAI transcription, without keeping the
+    rest of the document (full text, utterances) in memory. Streamed with ijson
+    when it's installed; cached on disk like load_transcription.
+    """
+    return _load_cached(path, 'words', _parse_words)
+
 def get_words(transcription):
     """Extract word list from transcription."""
     return transcription.get('words', [])
 
+# Characters normalize_word keeps; everything else (punctuation, hyphens,
+# spaces, other scripts) is dropped
+_NORM_KEEP = frozenset('abcdefghijklmnopqrstuvwxyz0123456789àâäéèêëïîôùûüÿçœæ')
+
+class _NormTable(dict):
+    """
+    str.translate table for normalize_word, filled lazily: each distinct
+    character is classified once, so no regex runs per word.
+    """
+    def __missing__(self, code):
+        self[code] = code if chr(code) in _NORM_KEEP else None
+        return self[code]
+
+_NORM_TABLE = _NormTable()
+
+@functools.lru_cache(maxsize=None)
 def normalize_word(text):
-    """Normalize a word for matching: lowercase, strip all punctuation INCLUDING hyphens."""
+    """
+    Normalize a word for matching: lowercase, strip all punctuation INCLUDING hyphens.
+    Memoized: transcripts repeat a small vocabulary many times over.
+    """
     # Remove ALL punctuation including hyphens to match "text-to-speech" with "text to speech"
-    return re.sub(r'[^a-z0-9àâäéèêëïîôùûüÿçœæ]', '', text.lower())
+    return text.lower().translate(_NORM_TABLE)
 
-def align_words(raw_words, exp_words, min_block_size=2, max_internal_gap_ms=1500):
+class Aligner:
+    """
+    Word-id aligner bound to one expected transcript.
+    
+    SequenceMatcher caches its index of the second sequence (b2j), so keeping one
+    Aligner around while aligning several raw word lists against the same
+    expected words (parameter sweeps, repeated runs) builds that index once.
+    """
+    
+    def __init__(self, exp_texts):
+        # Match on small int ids instead of strings: cheaper hashing/equality in b2j
+        self.vocab = {}
+        self.exp_ids = self.ids(exp_texts)
+        self.matcher = difflib.SequenceMatcher(None, autojunk=False)
+        self.matcher.set_seq2(self.exp_ids)
+    
+    def ids(self, texts):
+        """Map normalized words to ids shared with the expected side."""
+        return [self.vocab.setdefault(t, len(self.vocab)) for t in texts]
+    
+    def matching_blocks(self, raw_ids, anchored=False):
+        if anchored:
+            return _anchored_blocks(raw_ids, self.exp_ids)
+        return _matching_blocks(raw_ids, self.exp_ids, matcher=self.matcher)
+
+def align_words(raw_words, exp_words, min_block_size=2, max_internal_gap_ms=1500, emit_preview=False,
+                anchored=False, aligner=None, raw_norm=None, exp_norm=None):
     """
     Use difflib.SequenceMatcher to find matching blocks between
     raw and expected word sequences, then split blocks at large internal gaps.
     
     v3: Reduced min_block_size to 1 for segments near larger blocks to capture small gaps.
     
+    Segments only carry a text 'preview' (for inspecting segments.json) when
+    emit_preview is set. With anchored=True the blocks come from
+    _anchored_blocks, which scales to very long transcripts. Pass an Aligner
+    built from exp_words to reuse it across calls. raw_norm/exp_norm are the
+    pre-normalized word lists, computed here when not given.
+    
     Returns list of segments with time ranges.
     """
-    raw_texts = [normalize_word(w['text']) for w in raw_words]
-    exp_texts = [normalize_word(w['text']) for w in exp_words]
+    raw_texts = raw_norm if raw_norm is not None else [normalize_word(w['text']) for w in raw_words]
+    if aligner is None:
+        if exp_norm is None:
+            exp_norm = [normalize_word(w['text']) for w in exp_words]
+        aligner = Aligner(exp_norm)
+    
+    blocks = aligner.matching_blocks(aligner.ids(raw_texts), anchored=anchored)
     
-    sm = difflib.SequenceMatcher(None, raw_texts, exp_texts, autojunk=False)
-    blocks = sm.get_matching_blocks()
+    # Word times as plain columns: slicing beats per-word dict lookups below
+    raw_starts = [w['start'] for w in raw_words]
+    raw_ends = [w['end'] for w in raw_words]
     
     log(f"  difflib found {len(blocks)} raw matching blocks")
     
+    # Start times of large blocks, sorted for the nearest-neighbour lookup below
+    large_block_times = sorted(raw_starts[b.a] for b in blocks if b.size >= 5)
+    
     segments = []
     for block_idx, block in enumerate(blocks):
         # Allow size=1 if this block is close to a larger block (within 10s in raw timeline)
         is_near_large_block = False
         if block.size == 1 and block.a < len(raw_words):
-            for other_block in blocks:
-                if other_block.size >= 5 and other_block != block:
-                    time_dist = abs(raw_words[block.a]['start'] - raw_words[other_block.a]['start'])
-                    if time_dist < 15000:  # Within 15s
-                        is_near_large_block = True
-                        break
+            # Only the closest large block on either side can be within 15s
+            t = raw_starts[block.a]
+            k = bisect_left(large_block_times, t)
+            is_near_large_block = (
+                (k < len(large_block_times) and large_block_times[k] - t < 15000) or
+                (k > 0 and t - large_block_times[k - 1] < 15000)
+            )
         
         effective_min_size = 1 if is_near_large_block else min_block_size
         
@@ -85,23 +234,27 @@ def align_words(raw_words, exp_words, min_block_size=2, max_internal_gap_ms=1500
         sub_start = block.a
         sub_exp_start = block.b
         
-        for i in range(block.size - 1):
+        # Offsets i where the silence between word block.a+i and the next one is too long
+        block_end = block.a + block.size
+        splits = [i for i, (next_start, end) in enumerate(zip(raw_starts[block.a + 1:block_end],
+                                                              raw_ends[block.a:block_end - 1]))
+                  if next_start - end > max_internal_gap_ms]
+        
+        for i in splits:
             raw_idx = block.a + i
             next_raw_idx = block.a + i + 1
-            gap = raw_words[next_raw_idx]['start'] - raw_words[raw_idx]['end']
-            
-            if gap > max_internal_gap_ms:
-                # End current sub-block here
-                sub_size = (raw_idx + 1) - sub_start
-                if sub_size >= effective_min_size:
-                    segments.append(_make_segment(
-                        raw_words, exp_words, raw_texts,
-                        sub_start, sub_size,
-                        sub_exp_start, sub_size
-                    ))
-                # Start new sub-block
-                sub_start = next_raw_idx
-                sub_exp_start = block.b + i + 1
+            # End current sub-block here
+            sub_size = (raw_idx + 1) - sub_start
+            if sub_size >= effective_min_size:
+                segments.append(_make_segment(
+                    raw_words, exp_words, raw_texts,
+                    sub_start, sub_size,
+                    sub_exp_start, sub_size,
+                    emit_preview
+                ))
+            # Start new sub-block
+            sub_start = next_raw_idx
+            sub_exp_start = block.b + i + 1
         
         # Final sub-block
         sub_size = (block.a + block.size) - sub_start
@@ -109,17 +262,136 @@ def align_words(raw_words, exp_words, min_block_size=2, max_internal_gap_ms=1500
             segments.append(_make_segment(
                 raw_words, exp_words, raw_texts,
                 sub_start, sub_size,
-                sub_exp_start, sub_size
+                sub_exp_start, sub_size,
+                emit_preview
             ))
     
     return segments
 
-def _make_segment(raw_words, exp_words, raw_texts, raw_start_idx, size, exp_start_idx, exp_size):
+def _matching_blocks(a, b, matcher=None):
+    """
+    SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks(), skipping
+    the matcher entirely when the two lists are identical.
+    
+    matcher, if given, must already have b as its seq2 (its b2j index is reused).
+    """
+    if a == b:
+        return ([difflib.Match(0, 0, len(a))] if a else []) + [difflib.Match(len(a), len(b), 0)]
+    
+    if matcher is not None:
+        matcher.set_seq1(a)
+        sm = matcher
+    else:
+        sm = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    return sm.get_matching_blocks()
+
+def _gap_blocks(a, b):
+    """
+    Matching blocks for a short stretch between anchors: the equal runs of a
+    Levenshtein alignment when rapidfuzz is installed, difflib otherwise.
+    """
+    if Levenshtein is None:
+        return _matching_blocks(a, b)
+    blocks = [difflib.Match(op.src_start, op.dest_start, op.src_end - op.src_start)
+              for op in Levenshtein.opcodes(a, b) if op.tag == 'equal']
+    blocks.append(difflib.Match(len(a), len(b), 0))
+    return blocks
+
+def _gap_block_triples(gap):
+    """Process-pool worker: plain (a, b, size) tuples for one anchor gap."""
+    return [tuple(block) for block in _gap_blocks(*gap)[:-1]]
+
+def _anchored_blocks(a, b, n=3, workers=None):
+    """
+    Approximate SequenceMatcher matching blocks in near-linear time.
+    
+    n-grams that occur exactly once in both sequences are used as anchors; the
+    longest increasing chain of anchors (by position in b) is kept, consecutive
+    anchors on the same diagonal are grown into runs, and only the gaps between
+    runs are aligned (see _gap_blocks). n=1 anchors on rare words.
+    
+    The gaps are independent, so when there is enough work they are aligned in
+    up to `workers` processes (default: all available CPUs).
+    """
+    grams_a = list(zip(*(a[k:] for k in range(n))))
+    grams_b = list(zip(*(b[k:] for k in range(n))))
+    count_a = Counter(grams_a)
+    count_b = Counter(grams_b)
+    pos_b = {g: j for j, g in enumerate(grams_b) if count_b[g] == 1}
+    anchors = [(i, pos_b[g]) for i, g in enumerate(grams_a) if count_a[g] == 1 and g in pos_b]
+    
+    # Longest increasing subsequence of b-positions (anchors are already sorted by a)
+    tails, tail_idx, prev = [], [], [-1] * len(anchors)
+    for k, (_, j) in enumerate(anchors):
+        t = bisect_left(tails, j)
+        if t == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[t] = j
+            tail_idx[t] = k
+        prev[k] = tail_idx[t - 1] if t else -1
+    chain = []
+    k = tail_idx[-1] if tail_idx else -1
+    while k != -1:
+        chain.append(anchors[k])
+        k = prev[k]
+    chain.reverse()
+    
+    # Grow anchors on the same diagonal into runs, dropping ones already covered
+    runs = []
+    for i, j in chain:
+        if runs:
+            ra, rb, size = runs[-1]
+            if i - j == ra - rb and i <= ra + size:
+                runs[-1] = (ra, rb, i + n - ra)
+                continue
+            if i < ra + size or j < rb + size:
+                continue
+        runs.append((i, j, n))
+    
+    # Slices between consecutive runs (and before the first / after the last)
+    runs.append((len(a), len(b), 0))
+    gap_starts = []
+    gaps = []
+    pa = pb = 0
+    for ra, rb, size in runs:
+        gap_starts.append((pa, pb))
+        gaps.append((a[pa:ra], b[pb:rb]))
+        pa, pb = ra + size, rb + size
+    
+    if workers is None:
+        workers = cpu_count()
+    work = sum(len(ga) * len(gb) for ga, gb in gaps)
+    if workers > 1 and len(gaps) > 1 and work >= PARALLEL_GAP_MIN_WORK:
+        with ProcessPoolExecutor(max_workers=min(workers, len(gaps))) as executor:
+            gap_results = list(executor.map(_gap_block_triples, gaps, chunksize=8))
+    else:
+        gap_results = [_gap_block_triples(gap) for gap in gaps]
+    
+    blocks = []
+    for (pa, pb), triples, (ra, rb, size) in zip(gap_starts, gap_results, runs):
+        for ga, gb, gsize in triples:
+            blocks.append(difflib.Match(ga + pa, gb + pb, gsize))
+        if size:
+            blocks.append(difflib.Match(ra, rb, size))
+    
+    # Join blocks that touch on the same diagonal, as get_matching_blocks() does
+    merged = []
+    for block in blocks:
+        if merged and merged[-1].a + merged[-1].size == block.a and merged[-1].b + merged[-1].size == block.b:
+            last = merged.pop()
+            block = difflib.Match(last.a, last.b, last.size + block.size)
+        merged.append(block)
+    merged.append(difflib.Match(len(a), len(b), 0))
+    return merged
+
+def _make_segment(raw_words, exp_words, raw_texts, raw_start_idx, size, exp_start_idx, exp_size, emit_preview=False):
     """Create a segment dict from indices."""
     raw_end_idx = raw_start_idx + size - 1
     exp_end_idx = exp_start_idx + exp_size - 1
     
-    return {
+    seg = {
         'raw_start_ms': raw_words[raw_start_idx]['start'],
         'raw_end_ms': raw_words[raw_end_idx]['end'],
         'raw_start_idx': raw_start_idx,
@@ -129,21 +401,84 @@ def _make_segment(raw_words, exp_words, raw_texts, raw_start_idx, size, exp_star
         'exp_start_idx': exp_start_idx,
         'exp_end_idx': exp_end_idx,
         'word_count': size,
-        'preview': ' '.join(raw_texts[raw_start_idx:raw_start_idx + min(6, size)]),
     }
+    if emit_preview:
+        seg['preview'] = ' '.join(raw_texts[raw_start_idx:raw_start_idx + min(6, size)])
+    return seg
+
+def _sorted_by(segments, key):
+    """
+    Return segments ordered by seg[key]. Passes mostly receive lists that are
+    already ordered, so check that in O(n) and return the same list if so.
+    """
+    values = [s[key] for s in segments]
+    if all(a <= b for a, b in zip(values, values[1:])):
+        return segments
+    return sorted(segments, key=lambda s: s[key])
 
-def fill_gaps_with_fuzzy_matching(segments, raw_words, exp_words, max_gap_words=15, max_gap_time_ms=5000):
+def _indel_ratio(a, b):
+    """
+    Normalized Indel similarity 2 * LCS / (len(a) + len(b)), the same value as
+    rapidfuzz.fuzz.ratio / 100. Without rapidfuzz, LCS is computed bit-parallel
+    (Hyyrö): one big-int update per character of b.
+    """
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    if fuzz is not None:
+        return fuzz.ratio(a, b) / 100.0
+    masks = {}
+    for i, c in enumerate(a):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    v = full
+    for c in b:
+        u = v & masks.get(c, 0)
+        v = ((v + u) | (v - u)) & full
+    lcs = len(a) - v.bit_count()
+    return 2 * lcs / total
+
+@functools.lru_cache(maxsize=65536)
+def _window_score(exp_text, raw_text):
+    """
+    Fuzzy score of a raw window against the expected gap text (both normalized and joined).
+    Memoized (bounded): short filler phrases recur across gaps and windows.
+    """
+    if raw_text == exp_text:
+        return 1.0  # Perfect match
+    # Fuzzy match: check substring containment
+    if exp_text in raw_text or raw_text in exp_text:
+        return min(len(exp_text), len(raw_text)) / max(len(exp_text), len(raw_text))
+    # Character-level similarity: Indel ratio, which tolerates shifted characters
+    return _indel_ratio(exp_text, raw_text)
+
+def fill_gaps_with_fuzzy_matching(segments, raw_words, exp_words, max_gap_words=15, max_gap_time_ms=5000,
+                                  emit_preview=False, raw_norm=None, exp_norm=None):
     """
     After initial alignment, look for small gaps in the expected timeline and try to find
     matching content in the raw timeline using fuzzy substring matching.
     
     This helps recover content that difflib missed due to transcription differences
     (e.g., "text-to-speech" vs "text to speech" or "youtubeclotestbot" vs "YouTube CLO Test Bot").
+    
+    Recovered segments are flagged with 'filled_gap' so later passes keep them.
     """
     if len(segments) < 2:
         return segments
     
-    segments = sorted(segments, key=lambda s: s['exp_start_ms'])
+    if raw_norm is None:
+        raw_norm = [normalize_word(w['text']) for w in raw_words]
+    if exp_norm is None:
+        exp_norm = [normalize_word(w['text']) for w in exp_words]
+    
+    # Each side as one joined string plus word offsets, so the normalized text of
+    # words i..j is the slice blob[off[i]:off[j + 1]] (no join per window)
+    raw_blob = ''.join(raw_norm)
+    raw_off = list(itertools.accumulate(map(len, raw_norm), initial=0))
+    exp_blob = ''.join(exp_norm)
+    exp_off = list(itertools.accumulate(map(len, exp_norm), initial=0))
+    
+    segments = _sorted_by(segments, 'exp_start_ms')
     new_segments = []
     filled_gaps = 0
     
@@ -168,7 +503,8 @@ def fill_gaps_with_fuzzy_matching(segments, raw_words, exp_words, max_gap_words=
         
         # Get the expected text in the gap
         exp_gap_text = ' '.join([exp_words[j]['text'] for j in range(exp_gap_start_idx, exp_gap_end_idx + 1)])
-        exp_gap_normalized = ''.join([normalize_word(exp_words[j]['text']) for j in range(exp_gap_start_idx, exp_gap_end_idx + 1)])
+        exp_gap_normalized = exp_blob[exp_off[exp_gap_start_idx]:exp_off[exp_gap_end_idx + 1]]
+        exp_len = len(exp_gap_normalized)
         
         # Look for this content in the raw timeline between current and next segment
         raw_search_start_idx = current['raw_end_idx'] + 1
@@ -189,19 +525,18 @@ def fill_gaps_with_fuzzy_matching(segments, raw_words, exp_words, max_gap_words=
                 if end_idx > raw_search_end_idx:
                     break
                 
-                raw_window_normalized = ''.join([normalize_word(raw_words[j]['text']) for j in range(start_idx, end_idx + 1)])
+                # Every score is at most 2 * shortest / (sum of lengths), so windows
+                # whose lengths can't reach the threshold (or beat the best so far)
+                # are skipped without slicing or comparing any characters
+                raw_len = raw_off[end_idx + 1] - raw_off[start_idx]
+                if raw_len or exp_len:
+                    bound = 2 * min(raw_len, exp_len) / (raw_len + exp_len)
+                    if bound < 0.6 or bound <= best_match_score:
+                        continue
                 
-                # Compare normalized strings
-                if raw_window_normalized == exp_gap_normalized:
-                    score = 1.0  # Perfect match
-                else:
-                    # Fuzzy match: check substring containment
-                    if exp_gap_normalized in raw_window_normalized or raw_window_normalized in exp_gap_normalized:
-                        score = min(len(exp_gap_normalized), len(raw_window_normalized)) / max(len(exp_gap_normalized), len(raw_window_normalized))
-                    else:
-                        # Character-level similarity
-                        matches = sum(1 for a, b in zip(exp_gap_normalized, raw_window_normalized) if a == b)
-                        score = matches / max(len(exp_gap_normalized), len(raw_window_normalized))
+                raw_window_normalized = raw_blob[raw_off[start_idx]:raw_off[end_idx + 1]]
+                
+                score = _window_score(exp_gap_normalized, raw_window_normalized)
                 
                 if score > best_match_score and score >= 0.6:  # Threshold for acceptance
                     best_match_score = score
@@ -220,8 +555,10 @@ def fill_gaps_with_fuzzy_matching(segments, raw_words, exp_words, max_gap_words=
                 'exp_start_idx': exp_gap_start_idx,
                 'exp_end_idx': exp_gap_end_idx,
                 'word_count': gap_word_count,
-                'preview': f"[FILLED GAP {best_match_score:.0%}] {exp_gap_text[:50]}",
+                'filled_gap': True,
             }
+            if emit_preview:
+                new_seg['preview'] = f"[FILLED GAP {best_match_score:.0%}] {exp_gap_text[:50]}"
             new_segments.append(new_seg)
             filled_gaps += 1
             log(f"  Filled gap: exp {exp_gap_start_idx}-{exp_gap_end_idx} ({gap_word_count}w) matched to raw {best_match_idx}-{best_match_end_idx} (score={best_match_score:.0%}): {exp_gap_text[:60]}")
@@ -233,11 +570,32 @@ def fill_gaps_with_fuzzy_matching(segments, raw_words, exp_words, max_gap_words=
     if filled_gaps > 0:
         log(f"  Filled {filled_gaps} gaps with fuzzy matching")
         # Re-sort by expected timeline
-        new_segments = sorted(new_segments, key=lambda s: s['exp_start_ms'])
+        new_segments = _sorted_by(new_segments, 'exp_start_ms')
     
     return new_segments
 
-def detect_and_remove_retakes(segments, raw_words, base_threshold=0.55):
+def _retake_reason(first_match_ratio, similarity, time_gap, count1, count2, threshold):
+    """
+    Decide whether seg1 is a retake of the later seg2; return the log reason or None.
+    
+    Every case requires seg2 to have at least as many words as seg1, so callers
+    skip pairs with count2 < count1 before scoring them.
+    """
+    # Case 1: High first-word match + decent overall overlap
+    if first_match_ratio >= 0.75 and similarity >= 0.40:
+        return f"first-word {first_match_ratio*100:.0f}%, content {similarity*100:.0f}%"
+    
+    # Case 2: Very high overall similarity
+    if similarity >= threshold and count2 > count1:
+        return f"high-sim {similarity*100:.0f}%"
+    
+    # Case 3: Within short time window + good overlap
+    if time_gap < 5.0 and similarity >= threshold * 0.85:
+        return f"close-time {time_gap:.1f}s, sim {similarity*100:.0f}%"
+    
+    return None
+
+def detect_and_remove_retakes(segments, raw_words, base_threshold=0.55, raw_norm=None):
     """
     Enhanced retake detection with multi-segment lookahead (v2).
     
@@ -250,91 +608,94 @@ def detect_and_remove_retakes(segments, raw_words, base_threshold=0.55):
     if not segments:
         return []
     
-    segments = sorted(segments, key=lambda s: s['raw_start_ms'])
-    to_remove = set()
+    if raw_norm is None:
+        raw_norm = [normalize_word(w['text']) for w in raw_words]
+    
+    segments = _sorted_by(segments, 'raw_start_ms')
+    removed = bytearray(len(segments))  # one flag byte per segment
+    
+    # Intern words to small ints (empty words map to -1 and are left out of the
+    # sets), then build per-segment word sets and leading words once. A word
+    # set is an int bitmask over the ids: overlap is one AND plus a popcount.
+    vocab = {'': -1}
+    raw_ids = [vocab.setdefault(w, len(vocab)) for w in raw_norm]
+    seg_words = [raw_ids[s['raw_start_idx']:s['raw_end_idx'] + 1] for s in segments]
+    seg_sets = []
+    for words in seg_words:
+        mask = 0
+        for word_id in words:
+            if word_id >= 0:
+                mask |= 1 << word_id
+        seg_sets.append(mask)
+    seg_first = [words[:4] for words in seg_words]
+    
+    # Column views of the segment fields the pair loop reads
+    start_ms = [s['raw_start_ms'] for s in segments]
+    end_ms = [s['raw_end_ms'] for s in segments]
+    word_count = [s['word_count'] for s in segments]
     
     for i in range(len(segments)):
-        if i in to_remove:
+        if removed[i]:
             continue
             
-        seg1 = segments[i]
+        count1 = word_count[i]
         
         # Only check short segments as potential retakes
-        if seg1['word_count'] >= 20:
+        if count1 >= 20:
             continue
         
         # Adaptive threshold: shorter segments get lower threshold
-        if seg1['word_count'] <= 6:
+        if count1 <= 6:
             threshold = 0.50
-        elif seg1['word_count'] <= 10:
+        elif count1 <= 10:
             threshold = 0.55
         else:
             threshold = 0.65
         
         # Look ahead up to 3 segments or 15 seconds
         for j in range(i + 1, min(i + 4, len(segments))):
-            if j in to_remove:
+            if removed[j]:
                 continue
                 
-            seg2 = segments[j]
+            count2 = word_count[j]
             
             # Time window check
-            time_gap = (seg2['raw_start_ms'] - seg1['raw_end_ms']) / 1000.0
+            time_gap = (start_ms[j] - end_ms[i]) / 1000.0
             if time_gap > 15.0:
                 break
             
-            # Get words
-            words1_all = [raw_words[k]['text'] for k in range(seg1['raw_start_idx'], seg1['raw_end_idx'] + 1)]
-            words2_all = [raw_words[k]['text'] for k in range(seg2['raw_start_idx'], seg2['raw_end_idx'] + 1)]
+            # A shorter seg2 can't be the better take
+            if count2 < count1:
+                continue
             
             # Check first-word pattern (common retake signature)
-            first_words1 = words1_all[:min(4, len(words1_all))]
-            first_words2 = words2_all[:min(4, len(words2_all))]
+            first_words1 = seg_first[i]
+            first_words2 = seg_first[j]
             
-            first_match = sum(1 for w1, w2 in zip(first_words1, first_words2) 
-                            if normalize_word(w1) == normalize_word(w2))
+            first_match = sum(1 for w1, w2 in zip(first_words1, first_words2) if w1 == w2)
             first_match_ratio = first_match / len(first_words1) if first_words1 else 0
             
-            # Normalize words for content comparison
-            words1 = set(normalize_word(w) for w in words1_all)
-            words2 = set(normalize_word(w) for w in words2_all)
-            
-            words1 = {w for w in words1 if w}
-            words2 = {w for w in words2 if w}
+            # Word sets for content comparison
+            words1 = seg_sets[i]
+            words2 = seg_sets[j]
             
             if not words1 or not words2:
                 continue
             
             # Calculate overlap
-            overlap = len(words1 & words2)
-            similarity = overlap / len(words1)
+            overlap = (words1 & words2).bit_count()
+            similarity = overlap / words1.bit_count()
             
             # Decision logic
-            is_retake = False
-            reason = ""
-            
-            # Case 1: High first-word match + decent overall overlap
-            if first_match_ratio >= 0.75 and similarity >= 0.40 and seg2['word_count'] >= seg1['word_count']:
-                is_retake = True
-                reason = f"first-word {first_match_ratio*100:.0f}%, content {similarity*100:.0f}%"
-            
-            # Case 2: Very high overall similarity
-            elif similarity >= threshold and seg2['word_count'] > seg1['word_count']:
-                is_retake = True
-                reason = f"high-sim {similarity*100:.0f}%"
-            
-            # Case 3: Within short time window + good overlap
-            elif time_gap < 5.0 and similarity >= threshold * 0.85 and seg2['word_count'] >= seg1['word_count']:
-                is_retake = True
-                reason = f"close-time {time_gap:.1f}s, sim {similarity*100:.0f}%"
+            reason = _retake_reason(first_match_ratio, similarity, time_gap, count1, count2, threshold)
             
-            if is_retake:
-                to_remove.add(i)
-                log(f"  Retake: seg{i} ({seg1['word_count']}w) → seg{j} ({seg2['word_count']}w) [{reason}]")
+            if reason is not None:
+                removed[i] = 1
+                log(f"  Retake: seg{i} ({count1}w) → seg{j} ({count2}w) [{reason}]")
                 break  # Found a better version, stop looking
     
-    result = [seg for i, seg in enumerate(segments) if i not in to_remove]
-    log(f"  Removed {len(to_remove)} retakes, {len(result)} segments remain")
+    result = [seg for seg, gone in zip(segments, removed) if not gone]
+    log(f"  Removed {len(segments) - len(result)} retakes, {len(result)} segments remain")
     return result
 
 def merge_segments(segments, gap_threshold_ms=500):
@@ -344,22 +705,39 @@ def merge_segments(segments, gap_threshold_ms=500):
     if not segments:
         return []
     
-    segments = sorted(segments, key=lambda s: s['raw_start_ms'])
+    segments = _sorted_by(segments, 'raw_start_ms')
+    starts = [s['raw_start_ms'] for s in segments]
     
-    merged = [segments[0].copy()]
-    for seg in segments[1:]:
-        prev = merged[-1]
-        gap = seg['raw_start_ms'] - prev['raw_end_ms']
-        
-        if gap <= gap_threshold_ms:
-            prev['raw_end_ms'] = max(prev['raw_end_ms'], seg['raw_end_ms'])
-            prev['raw_end_idx'] = max(prev['raw_end_idx'], seg['raw_end_idx'])
-            prev['exp_end_ms'] = max(prev['exp_end_ms'], seg['exp_end_ms'])
-            prev['exp_end_idx'] = max(prev['exp_end_idx'], seg['exp_end_idx'])
-            prev['word_count'] += seg['word_count']
-            prev['preview'] = prev.get('preview', '') + ' ... ' + seg.get('preview', '')
-        else:
-            merged.append(seg.copy())
+    # Find group boundaries in one pass over the start/end columns: a segment
+    # opens a new group when it starts more than gap_threshold_ms after the
+    # furthest end reached so far by the current group.
+    ends = [s['raw_end_ms'] for s in segments]
+    bounds = [0]
+    reach = ends[0]
+    for i in range(1, len(segments)):
+        if starts[i] - reach > gap_threshold_ms:
+            bounds.append(i)
+            reach = ends[i]
+        elif ends[i] > reach:
+            reach = ends[i]
+    bounds.append(len(segments))
+    
+    # Build each merged segment once from its group. Segments that merge with
+    # nothing are passed through as-is (copy-on-write: only merged ones are new).
+    merged = []
+    for lo, hi in zip(bounds, bounds[1:]):
+        seg = segments[lo]
+        if hi - lo > 1:
+            seg = seg.copy()
+            group = segments[lo:hi]
+            seg['raw_end_ms'] = max(ends[lo:hi])
+            seg['raw_end_idx'] = max(g['raw_end_idx'] for g in group)
+            seg['exp_end_ms'] = max(g['exp_end_ms'] for g in group)
+            seg['exp_end_idx'] = max(g['exp_end_idx'] for g in group)
+            seg['word_count'] = sum(g['word_count'] for g in group)
+            if any(g.get('filled_gap') for g in group):
+                seg['filled_gap'] = True
+        merged.append(seg)
     
     return merged
 
@@ -379,8 +757,9 @@ def remove_overlaps(segments):
     if not segments:
         return []
     
-    segments = sorted(segments, key=lambda s: s['raw_start_ms'])
-    result = [segments[0].copy()]
+    segments = _sorted_by(segments, 'raw_start_ms')
+    # Segments are only read here, so they are copied only when trimmed
+    result = [segments[0]]
     
     for seg in segments[1:]:
         prev = result[-1]
@@ -402,14 +781,14 @@ def remove_micro_segments(segments, min_duration_ms=1500, min_words=5):
     if not segments:
         return []
     
-    segments = sorted(segments, key=lambda s: s['raw_start_ms'])
+    segments = _sorted_by(segments, 'raw_start_ms')
     result = []
     
     for i, seg in enumerate(segments):
         duration = seg['raw_end_ms'] - seg['raw_start_ms']
         
         # Always keep filled gaps (they're legit content we recovered)
-        if 'FILLED GAP' in seg.get('preview', ''):
+        if seg.get('filled_gap'):
             result.append(seg)
             continue
         
@@ -430,10 +809,201 @@ def remove_micro_segments(segments, min_duration_ms=1500, min_words=5):
     
     return result
 
+def _run_ffmpeg(cmd, timeout, input=None, tail_bytes=500, cwd=None):
+    """
+    Run an ffmpeg command and return (returncode, stderr tail).
+    
+    stderr goes to an anonymous temp file instead of a pipe, so a long render's
+    progress output is never buffered and decoded in Python; only the last
+    tail_bytes are read back.
+    """
+    with tempfile.TemporaryFile() as err:
+        result = subprocess.run(
+            cmd,
+            input=input.encode() if input is not None else None,
+            stdin=subprocess.DEVNULL if input is None else None,
+            stdout=subprocess.DEVNULL,
+            stderr=err,
+            timeout=timeout,
+            cwd=cwd,
+        )
+        size = err.seek(0, os.SEEK_END)
+        err.seek(max(0, size - tail_bytes))
+        return result.returncode, err.read().decode('utf-8', 'replace')
+
+def _concat_list(files):
+    """
+    Build a concat demuxer file list for stdin, escaping single quotes in paths.
+    Entries are absolute file: URLs since there is no list file to resolve against.
+    """
+    lines = []
+    for path in files:
+        quoted = str(Path(path).resolve()).replace("'", "'\\''")
+        lines.append(f"file 'file:{quoted}'\n")
+    return ''.join(lines)
+
+def _filter_render_cmd(script_path, input_file, output_file, lossless=False, start_s=0.0, duration_s=None,
+                       threads=0):
+    """
+    Build the ffmpeg command that applies the filter graph in script_path to the
+    input read from start_s for duration_s seconds.
+    With lossless=True the output is 16-bit PCM (for batches that get encoded later).
+    threads is ffmpeg's -threads (0 = automatic, one per core).
+    """
+    window = ['-ss', f'{start_s:.3f}'] if start_s else []
+    if duration_s is not None:
+        window += ['-t', f'{duration_s:.3f}']
+    return [
+        'ffmpeg', '-y',
+        *window,
+        '-i', str(input_file),
+        '-filter_complex_script', str(script_path),
+        '-map', '[out]',
+        '-threads', str(threads),
+        *(['-c:a', 'pcm_s16le'] if lossless else ['-c:a', 'aac', '-b:a', '128k']),
+        '-ar', '44100',
+        '-ac', '2',
+        '-vn',
+        str(output_file)
+    ]
+
+def _run_filter_render(segments, input_file, output_file, lossless=False, threads=0):
+    """
+    Cut segments with atrim and join them with concat in one ffmpeg run.
+    The graph is passed as a script file rather than on the command line, so
+    long edits don't hit argv limits. Returns (returncode, stderr tail).
+    
+    Only the span covered by the segments is read: the input is seeked to the
+    first segment and atrim times are relative to it.
+    """
+    base_ms = min(seg['raw_start_ms'] for seg in segments)
+    end_ms = max(seg['raw_end_ms'] for seg in segments)
+    
+    # Stream the graph straight into the script file, one filter per line
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', prefix='autotrim_filter_', delete=False) as f:
+        for i, seg in enumerate(segments):
+            f.write(f"[0:a:0]atrim=start={(seg['raw_start_ms'] - base_ms) / 1000.0:.3f}"
+                    f":end={(seg['raw_end_ms'] - base_ms) / 1000.0:.3f},"
+                    f"asetpts=PTS-STARTPTS[a{i}];\n")
+        for i in range(len(segments)):
+            f.write(f"[a{i}]")
+        f.write(f"concat=n={len(segments)}:v=0:a=1[out]\n")
+        script_path = f.name
+    try:
+        cmd = _filter_render_cmd(script_path, input_file, output_file, lossless=lossless,
+                                 start_s=base_ms / 1000.0, duration_s=(end_ms - base_ms) / 1000.0,
+                                 threads=threads)
+        return _run_ffmpeg(cmd, timeout=1800)
+    finally:
+        os.unlink(script_path)
+
+def _render_one_batch(batch, batch_idx, input_file, tmp_dir):
+    """
+    Render one batch of segments to its own file. Returns the file path, or None on failure.
+    Batches run one per core, so each ffmpeg gets a single thread.
+    """
+    batch_file = tmp_dir / f'batch_{batch_idx:03d}.wav'
+    returncode, err = _run_filter_render(batch, input_file, batch_file, lossless=True, threads=1)
+    if returncode != 0:
+        log(f"  Warning: batch {batch_idx} failed: {err[-200:]}")
+        return None
+    return batch_file
+
+def render_with_filter(segments, input_file, output_file):
+    """
+    Render in a single ffmpeg pass: cut every segment out of the input audio with
+    atrim and join them with the concat filter, encoding AAC only once.
+    Avoids spawning one ffmpeg (and one seek + encoder init) per segment.
+    
+    Long edits are split into batches of FILTER_BATCH_SIZE segments to keep the
+    filter graph manageable; batches are rendered in parallel to lossless WAV and
+    encoded once while concatenating.
+    """
+    segments = [s for s in segments if s['raw_end_ms'] > s['raw_start_ms']]
+    log(f"Rendering {len(segments)} segments via filter_complex")
+    
+    if not segments:
+        log("ERROR: No segments to render!")
+        return False
+    
+    if len(segments) <= FILTER_BATCH_SIZE:
+        returncode, err = _run_filter_render(segments, input_file, output_file)
+        if returncode != 0:
+            log(f"Filter render failed: {err}")
+            return False
+        
+        log(f"Output saved to {output_file}")
+        return True
+    
+    tmp_dir = TEST_DIR / 'tmp_batches'
+    tmp_dir.mkdir(exist_ok=True)
+    for f in tmp_dir.glob('batch_*.wav'):
+        f.unlink()
+    
+    batches = [segments[i:i + FILTER_BATCH_SIZE] for i in range(0, len(segments), FILTER_BATCH_SIZE)]
+    workers = min(len(batches), cpu_count())
+    log(f"  {len(batches)} batches, {workers} parallel ffmpeg workers")
+    
+    # Each batch is an independent ffmpeg process reading the same input, so
+    # threads are enough: they only wait on the subprocesses.
+    batch_files = [None] * len(batches)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_render_one_batch, batch, idx, input_file, tmp_dir): idx
+            for idx, batch in enumerate(batches)
+        }
+        for future in as_completed(futures):
+            batch_files[futures[future]] = future.result()
+    
+    ok = True
+    if None in batch_files:
+        log(f"Filter render failed: {batch_files.count(None)}/{len(batches)} batches failed")
+        ok = False
+    else:
+        cmd = [
+            'ffmpeg', '-y',
+            '-f', 'concat',
+            '-safe', '0',
+            '-protocol_whitelist', 'file,pipe',
+            '-i', 'pipe:0',
+            '-map', '0:a:0',
+            '-threads', '0',
+            # Batches are PCM, so this is the only AAC encode
+            '-c:a', 'aac',
+            '-b:a', '128k',
+            '-ar', '44100',
+            '-ac', '2',
+            '-vn',
+            str(output_file)
+        ]
+        returncode, err = _run_ffmpeg(cmd, timeout=300, input=_concat_list(batch_files))
+        if returncode != 0:
+            log(f"Concat failed: {err}")
+            ok = False
+        else:
+            log(f"Output saved to {output_file}")
+    
+    # Cleanup
+    for f in tmp_dir.glob('batch_*.wav'):
+        try:
+            f.unlink()
+        except OSError:
+            pass
+    try:
+        tmp_dir.rmdir()
+    except OSError:
+        pass
+    
+    return ok
+
 def render_with_concat(segments, input_file, output_file):
     """
     Render by extracting each segment individually, then concatenating.
     Uses -ss before -i for fast seeking on large files.
+    
+    Segments are first stream-copied (no encode per segment) and the concat
+    pass encodes once; if the source audio can't be copied into MPEG-TS, all
+    segments are re-extracted as AAC and the concat just copies packets.
     """
     log(f"Rendering {len(segments)} segments via concat method")
     
@@ -444,9 +1014,7 @@ def render_with_concat(segments, input_file, output_file):
     for f in tmp_dir.glob('seg_*.ts'):
         f.unlink()
     
-    segment_files = []
-    failed = 0
-    
+    jobs = []
     for i, seg in enumerate(segments):
         start_s = seg['raw_start_ms'] / 1000.0
         duration_s = (seg['raw_end_ms'] - seg['raw_start_ms']) / 1000.0
@@ -457,24 +1025,41 @@ def render_with_concat(segments, input_file, output_file):
         # Use .ts (MPEG-TS) for seamless concatenation
         seg_file = tmp_dir / f'seg_{i:04d}.ts'
         
+        jobs.append((i, start_s, duration_s, seg_file))
+    
+    def extract(job, copy):
+        _, start_s, duration_s, seg_file = job
         cmd = [
             'ffmpeg', '-y',
             '-ss', f'{start_s:.3f}',
             '-i', str(input_file),
             '-t', f'{duration_s:.3f}',
-            '-c:a', 'aac',
-            '-b:a', '128k',
-            '-ar', '44100',
-            '-ac', '2',
+            '-map', '0:a:0',  # audio only: never decode the video stream
+            '-threads', '1',  # one ffmpeg per core already runs side by side
+            *(['-c:a', 'copy'] if copy else ['-c:a', 'aac', '-b:a', '128k', '-ar', '44100', '-ac', '2']),
             '-vn',  # no video
             '-f', 'mpegts',
             str(seg_file)
         ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=180)
-        if result.returncode != 0:
+        return _run_ffmpeg(cmd, timeout=180)
+    
+    # Segments are independent ffmpeg processes: run them side by side.
+    # executor.map keeps results in segment order for the checks below.
+    with ThreadPoolExecutor(max_workers=cpu_count()) as executor:
+        copied = True
+        results = list(executor.map(lambda job: extract(job, True), jobs))
+        if any(returncode != 0 for returncode, _ in results):
+            log("  Stream copy failed, re-encoding segments")
+            copied = False
+            results = list(executor.map(lambda job: extract(job, False), jobs))
+    
+    segment_files = []
+    failed = 0
+    
+    for (i, start_s, duration_s, seg_file), (returncode, err) in zip(jobs, results):
+        if returncode != 0:
             log(f"  Warning: segment {i} failed (start={start_s:.1f}s, dur={duration_s:.1f}s)")
-            log(f"    Error: {result.stderr[-200:]}")
+            log(f"    Error: {err[-200:]}")
             failed += 1
             continue
         
@@ -494,28 +1079,26 @@ def render_with_concat(segments, input_file, output_file):
         log("ERROR: No segments extracted!")
         return False
     
-    # Concatenate using concat protocol
-    concat_file = tmp_dir / 'concat.txt'
-    with open(concat_file, 'w') as f:
-        for sf in segment_files:
-            f.write(f"file '{sf}'\n")
-    
+    # MPEG-TS can be joined byte for byte, so the concat protocol reads the
+    # segments as one stream with no list to parse. Names are relative to
+    # tmp_dir (the ffmpeg cwd) to keep the argument short.
+    output_file = Path(output_file).resolve()
+    faststart = ['-movflags', '+faststart'] if output_file.suffix.lower() in ('.mp4', '.m4a', '.mov') else []
     cmd = [
         'ffmpeg', '-y',
-        '-f', 'concat',
-        '-safe', '0',
-        '-i', str(concat_file),
-        '-c:a', 'aac',
-        '-b:a', '128k',
-        '-ar', '44100',
-        '-ac', '2',
+        '-i', 'concat:' + '|'.join(sf.name for sf in segment_files),
+        '-map', '0:a:0',
+        # Copied segments get their single encode here; encoded ones are just remuxed
+        *(['-c:a', 'aac', '-b:a', '128k', '-ar', '44100', '-ac', '2'] if copied
+          else ['-c', 'copy', '-bsf:a', 'aac_adtstoasc']),
         '-vn',
+        *faststart,
         str(output_file)
     ]
     
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-    if result.returncode != 0:
-        log(f"Concat failed: {result.stderr[-500:]}")
+    returncode, err = _run_ffmpeg(cmd, timeout=300, cwd=tmp_dir)
+    if returncode != 0:
+        log(f"Concat failed: {err}")
         return False
     
     log(f"Output saved to {output_file}")
@@ -527,7 +1110,6 @@ def render_with_concat(segments, input_file, output_file):
         except:
             pass
     try:
-        concat_file.unlink()
         tmp_dir.rmdir()
     except:
         pass
@@ -536,6 +1118,22 @@ def render_with_concat(segments, input_file, output_file):
 
 def get_duration(filepath):
     """Get duration of an audio/video file in seconds."""
+    if mutagen is not None:
+        try:
+            info = mutagen.File(str(filepath))
+        except (mutagen.MutagenError, OSError):
+            info = None
+        if info is not None and info.info.length:
+            return info.info.length
+    
+    if av is not None:
+        try:
+            with av.open(str(filepath)) as container:
+                if container.duration is not None:
+                    return container.duration / av.time_base
+        except (av.error.FFmpegError, OSError):
+            pass
+    
     cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', str(filepath)]
     result = subprocess.run(cmd, capture_output=True, text=True)
     data = json.loads(result.stdout)
@@ -545,8 +1143,12 @@ def compare_outputs(output_file, expected_file, report_path):
     """Compare the generated output with the expected output."""
     log("Comparing outputs...")
     
-    out_duration = get_duration(output_file)
-    exp_duration = get_duration(expected_file)
+    # Both probes are independent I/O waits, run them side by side
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        out_future = executor.submit(get_duration, output_file)
+        exp_future = executor.submit(get_duration, expected_file)
+        out_duration = out_future.result()
+        exp_duration = exp_future.result()
     
     duration_diff = abs(out_duration - exp_duration)
     duration_ratio = min(out_duration, exp_duration) / max(out_duration, exp_duration)
@@ -568,47 +1170,60 @@ def compare_outputs(output_file, expected_file, report_path):
     
     return report
 
-def main():
-    parser = argparse.ArgumentParser(description='AutoTrim - Remove bad takes and silences')
-    parser.add_argument('--raw', default=str(TEST_DIR / 'raw.mov'), help='Raw input file')
-    parser.add_argument('--expected', default=str(TEST_DIR / 'expected.mp4'), help='Expected output file')
-    parser.add_argument('--output', default=str(TEST_DIR / 'output.mp4'), help='Output file')
-    parser.add_argument('--raw-transcription', default=str(TEST_DIR / 'raw_transcription.json'))
-    parser.add_argument('--expected-transcription', default=str(TEST_DIR / 'expected_transcription.json'))
-    parser.add_argument('--merge-gap', type=int, default=2500, help='Max gap in ms to merge segments')
-    parser.add_argument('--padding', type=int, default=150, help='Padding in ms around segments')
-    parser.add_argument('--min-words', type=int, default=2, help='Minimum words for a matching block')
-    parser.add_argument('--max-internal-gap', type=int, default=1500, help='Max gap within a block before splitting (ms)')
-    parser.add_argument('--dry-run', action='store_true', help='Only compute segments, skip rendering')
-    args = parser.parse_args()
-    
-    log("Loading transcriptions...")
-    raw_trans = load_transcription(args.raw_transcription)
-    exp_trans = load_transcription(args.expected_transcription)
-    
-    raw_words = get_words(raw_trans)
-    exp_words = get_words(exp_trans)
+def segments_cache_key(args):
+    """
+    Key for the segments cache: the transcription contents, every parameter that
+    affects segment computation, the retake detector compute_segments actually
+    calls (module, qualname and its module's source), the source of this script
+    and of the entry script (e.g. autotrim_v2.py), and the gap-alignment backend
+    (_gap_blocks differs between rapidfuzz and difflib under --fast-align).
+    """
+    detector = detect_and_remove_retakes
+    sources = [__file__, sys.modules[detector.__module__].__file__]
+    main_file = getattr(sys.modules.get('__main__'), '__file__', None)
+    if main_file:
+        sources.append(main_file)
     
-    log(f"Raw: {len(raw_words)} words, {raw_words[-1]['end']/1000:.1f}s")
-    log(f"Expected: {len(exp_words)} words, {exp_words[-1]['end']/1000:.1f}s")
+    h = hashlib.blake2b(digest_size=16)
+    for path in [args.raw_transcription, args.expected_transcription] + sorted(set(map(os.path.abspath, sources))):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    params = (args.merge_gap, args.padding, args.min_words, args.max_internal_gap,
+              args.fast_align, args.debug_preview,
+              f'{detector.__module__}.{detector.__qualname__}',
+              'rapidfuzz' if Levenshtein is not None else 'difflib')
+    h.update(repr(params).encode())
+    return h.hexdigest()
+
+def compute_segments(raw_words, exp_words, args):
+    """Run the alignment → retake removal → merge pipeline for the given CLI args."""
+    # Normalize every word once; all passes below index into these
+    raw_norm = [normalize_word(w['text']) for w in raw_words]
+    exp_norm = [normalize_word(w['text']) for w in exp_words]
     
     # Step 1: Align words with gap splitting
     log(f"Aligning words (min_words={args.min_words}, max_internal_gap={args.max_internal_gap}ms)...")
     segments = align_words(
         raw_words, exp_words,
         min_block_size=args.min_words,
-        max_internal_gap_ms=args.max_internal_gap
+        max_internal_gap_ms=args.max_internal_gap,
+        emit_preview=args.debug_preview,
+        anchored=args.fast_align,
+        raw_norm=raw_norm,
+        exp_norm=exp_norm
     )
     log(f"Found {len(segments)} segments after gap splitting")
     
     # Step 1.5: Fill gaps with fuzzy matching
     log(f"Filling gaps with fuzzy matching...")
-    segments = fill_gaps_with_fuzzy_matching(segments, raw_words, exp_words, max_gap_words=15, max_gap_time_ms=8000)
+    segments = fill_gaps_with_fuzzy_matching(segments, raw_words, exp_words, max_gap_words=15, max_gap_time_ms=8000,
+                                             emit_preview=args.debug_preview,
+                                             raw_norm=raw_norm, exp_norm=exp_norm)
     log(f"After gap filling: {len(segments)} segments")
     
     # Step 2: Detect and remove retakes (BEFORE merging)
     log(f"Detecting retakes...")
-    segments = detect_and_remove_retakes(segments, raw_words, base_threshold=0.55)
+    segments = detect_and_remove_retakes(segments, raw_words, base_threshold=0.55, raw_norm=raw_norm)
     
     # Step 3: Add padding
     segments = add_padding(segments, padding_ms=args.padding)
@@ -625,6 +1240,44 @@ def main():
     # Step 6: Remove overlaps
     segments = remove_overlaps(segments)
     
+    return segments
+
+def main():
+    parser = argparse.ArgumentParser(description='AutoTrim - Remove bad takes and silences')
+    parser.add_argument('--raw', default=str(TEST_DIR / 'raw.mov'), help='Raw input file')
+    parser.add_argument('--expected', default=str(TEST_DIR / 'expected.mp4'), help='Expected output file')
+    parser.add_argument('--output', default=str(TEST_DIR / 'output.mp4'), help='Output file')
+    parser.add_argument('--raw-transcription', default=str(TEST_DIR / 'raw_transcription.json'))
+    parser.add_argument('--expected-transcription', default=str(TEST_DIR / 'expected_transcription.json'))
+    parser.add_argument('--merge-gap', type=int, default=2500, help='Max gap in ms to merge segments')
+    parser.add_argument('--padding', type=int, default=150, help='Padding in ms around segments')
+    parser.add_argument('--min-words', type=int, default=2, help='Minimum words for a matching block')
+    parser.add_argument('--max-internal-gap', type=int, default=1500, help='Max gap within a block before splitting (ms)')
+    parser.add_argument('--dry-run', action='store_true', help='Only compute segments, skip rendering')
+    parser.add_argument('--fast-align', action='store_true', help='Use n-gram anchored alignment (for very long transcripts)')
+    parser.add_argument('--debug-preview', action='store_true', help='Store a text preview on each segment in segments.json')
+    args = parser.parse_args()
+    
+    log("Loading transcriptions...")
+    raw_words = load_words(args.raw_transcription)
+    exp_words = load_words(args.expected_transcription)
+    
+    log(f"Raw: {len(raw_words)} words, {raw_words[-1]['end']/1000:.1f}s")
+    log(f"Expected: {len(exp_words)} words, {exp_words[-1]['end']/1000:.1f}s")
+    
+    cache_path = SEG_CACHE_DIR / f'{segments_cache_key(args)}.json'
+    if cache_path.exists():
+        log(f"Using cached segments ({cache_path.name})")
+        with open(cache_path) as f:
+            segments = json.load(f)
+    else:
+        segments = compute_segments(raw_words, exp_words, args)
+        SEG_CACHE_DIR.mkdir(exist_ok=True)
+        tmp_path = cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(segments, f)
+        os.replace(tmp_path, cache_path)
+    
     # Calculate stats
     total_ms = sum(s['raw_end_ms'] - s['raw_start_ms'] for s in segments)
     log(f"Total segment duration: {total_ms/1000:.1f}s ({total_ms/60000:.1f}min)")
@@ -644,7 +1297,10 @@ def main():
     # Step 5: Render
     log("Starting render...")
     t0 = time.time()
-    success = render_with_concat(segments, args.raw, args.output)
+    success = render_with_filter(segments, args.raw, args.output)
+    if not success:
+        log("Falling back to per-segment render...")
+        success = render_with_concat(segments, args.raw, args.output)
     render_time = time.time() - t0
     log(f"Render took {render_time:.1f}s")
     
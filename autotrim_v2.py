@@ -14,104 +14,129 @@ Enhanced retake detection and alignment
 import sys
 sys.path.insert(0, '.')
 from autotrim import *
+from autotrim import _retake_reason
 
-def detect_retakes_v2(segments, raw_words, base_threshold=0.55):
+def _score_retakes(start_ms, end_ms, word_count, segment_features):
     """
-    Enhanced retake detection with multi-segment lookahead.
+    Pairwise retake scoring over plain per-segment columns.
+    segment_features(i) returns (first word ids, word-id bitmask) for segment i.
     
-    Improvements:
-    - Looks ahead 2-3 segments (not just adjacent)
-    - Lower threshold for very short segments
-    - Checks first 3-4 words specifically
-    - Time window: segments within 10s are compared more aggressively
+    Returns (i, j, reason) for every segment i that is a retake of a later j.
     """
-    if not segments:
-        return []
-    
-    segments = sorted(segments, key=lambda s: s['raw_start_ms'])
-    to_remove = set()
+    retakes = []
+    n = len(word_count)
     
-    for i in range(len(segments)):
-        if i in to_remove:
-            continue
-            
-        seg1 = segments[i]
+    for i in range(n):
+        count1 = word_count[i]
         
         # Only check short segments as potential retakes
-        if seg1['word_count'] >= 20:
+        if count1 >= 20:
             continue
         
         # Adaptive threshold: shorter segments get lower threshold
-        if seg1['word_count'] <= 6:
+        if count1 <= 6:
             threshold = 0.50
-        elif seg1['word_count'] <= 10:
+        elif count1 <= 10:
             threshold = 0.55
         else:
             threshold = 0.65
         
+        first_words1, words1 = segment_features(i)
+        if not words1:
+            continue
+        end1 = end_ms[i]
+        
         # Look ahead up to 3 segments or 15 seconds
-        for j in range(i + 1, min(i + 4, len(segments))):
-            if j in to_remove:
-                continue
-                
-            seg2 = segments[j]
-            
+        for j in range(i + 1, min(i + 4, n)):
             # Time window check
-            time_gap = (seg2['raw_start_ms'] - seg1['raw_end_ms']) / 1000.0
+            time_gap = (start_ms[j] - end1) / 1000.0
             if time_gap > 15.0:
                 break
             
-            # Get words
-            words1_all = [raw_words[k]['text'] for k in range(seg1['raw_start_idx'], seg1['raw_end_idx'] + 1)]
-            words2_all = [raw_words[k]['text'] for k in range(seg2['raw_start_idx'], seg2['raw_end_idx'] + 1)]
-            
-            # Check first-word pattern (common retake signature)
-            first_words1 = words1_all[:min(4, len(words1_all))]
-            first_words2 = words2_all[:min(4, len(words2_all))]
-            
-            first_match = sum(1 for w1, w2 in zip(first_words1, first_words2) 
-                            if normalize_word(w1) == normalize_word(w2))
-            first_match_ratio = first_match / len(first_words1) if first_words1 else 0
-            
-            # Normalize words for content comparison
-            words1 = set(normalize_word(w) for w in words1_all)
-            words2 = set(normalize_word(w) for w in words2_all)
-            
-            words1 = {w for w in words1 if w}
-            words2 = {w for w in words2 if w}
+            # A shorter seg2 can't be the better take
+            count2 = word_count[j]
+            if count2 < count1:
+                continue
             
-            if not words1 or not words2:
+            first_words2, words2 = segment_features(j)
+            if not words2:
                 continue
             
+            # Check first-word pattern (common retake signature)
+            first_match = sum(1 for w1, w2 in zip(first_words1, first_words2) if w1 == w2)
+            first_match_ratio = first_match / len(first_words1)
+            
             # Calculate overlap
-            overlap = len(words1 & words2)
-            similarity = overlap / len(words1)
+            overlap = (words1 & words2).bit_count()
+            similarity = overlap / words1.bit_count()
             
             # Decision logic
-            is_retake = False
-            
-            # Case 1: High first-word match + decent overall overlap
-            if first_match_ratio >= 0.75 and similarity >= 0.40 and seg2['word_count'] >= seg1['word_count']:
-                is_retake = True
-                reason = f"first-word {first_match_ratio*100:.0f}%, content {similarity*100:.0f}%"
-            
-            # Case 2: Very high overall similarity
-            elif similarity >= threshold and seg2['word_count'] > seg1['word_count']:
-                is_retake = True
-                reason = f"high-sim {similarity*100:.0f}%"
+            reason = _retake_reason(first_match_ratio, similarity, time_gap, count1, count2, threshold)
             
-            # Case 3: Within short time window + good overlap
-            elif time_gap < 5.0 and similarity >= threshold * 0.85 and seg2['word_count'] >= seg1['word_count']:
-                is_retake = True
-                reason = f"close-time {time_gap:.1f}s, sim {similarity*100:.0f}%"
-            
-            if is_retake:
-                to_remove.add(i)
-                log(f"  Retake: seg{i} ({seg1['word_count']}w) → seg{j} ({seg2['word_count']}w) [{reason}]")
+            if reason is not None:
+                retakes.append((i, j, reason))
                 break  # Found a better version, stop looking
     
-    result = [seg for i, seg in enumerate(segments) if i not in to_remove]
-    log(f"  Removed {len(to_remove)} retakes (v2), {len(result)} segments remain")
+    return retakes
+
+def detect_retakes_v2(segments, raw_words, base_threshold=0.55, raw_norm=None):
+    """
+    Enhanced retake detection with multi-segment lookahead.
+    
+    Improvements:
+    - Looks ahead 2-3 segments (not just adjacent)
+    - Lower threshold for very short segments
+    - Checks first 3-4 words specifically
+    - Time window: segments within 10s are compared more aggressively
+    
+    raw_norm (normalize_word of each raw word) can be passed in when the caller
+    already has it, as for detect_and_remove_retakes; normalize_word itself is
+    memoized in autotrim, so without it each distinct word is normalized once.
+    """
+    if not segments:
+        return []
+    
+    segments = sorted(segments, key=lambda s: s['raw_start_ms'])
+    
+    # Per-segment word data, built once and shared by every pair a segment is in.
+    # Words are interned to small ints (empty words map to -1 and are left out),
+    # and each segment's word set is an int bitmask over those ids, so an
+    # overlap is one AND plus a popcount.
+    vocab = {'': -1}
+    features = {}
+    def segment_features(idx):
+        if idx not in features:
+            seg = segments[idx]
+            if raw_norm is not None:
+                norm = raw_norm[seg['raw_start_idx']:seg['raw_end_idx'] + 1]
+            else:
+                norm = [normalize_word(raw_words[k]['text'])
+                        for k in range(seg['raw_start_idx'], seg['raw_end_idx'] + 1)]
+            ids = [vocab.setdefault(word, len(vocab)) for word in norm]
+            mask = 0
+            for word_id in ids:
+                if word_id >= 0:
+                    mask |= 1 << word_id
+            # (first 4 word ids, bitmask of non-empty word ids)
+            features[idx] = (ids[:4], mask)
+        return features[idx]
+    
+    # Column layout keeps dict lookups out of the pair loop
+    retakes = _score_retakes(
+        [seg['raw_start_ms'] for seg in segments],
+        [seg['raw_end_ms'] for seg in segments],
+        [seg['word_count'] for seg in segments],
+        segment_features,
+    )
+    
+    # One flag byte per segment instead of a set of indices
+    removed = bytearray(len(segments))
+    for i, j, reason in retakes:
+        removed[i] = 1
+        log(f"  Retake: seg{i} ({segments[i]['word_count']}w) → seg{j} ({segments[j]['word_count']}w) [{reason}]")
+    
+    result = [seg for seg, gone in zip(segments, removed) if not gone]
+    log(f"  Removed {len(segments) - len(result)} retakes (v2), {len(result)} segments remain")
     return result
 
 # Monkey-patch the original function for testing
@@ -6,34 +6,19 @@ Compare improved Claude results with ground truth.
 import json
 from pathlib import Path
 
+from json_utils import load_json
+from overlap_utils import chunks_overlapping_segments
+
 TEST_DIR = Path('/root/.openclaw/workspace/autotrim-desktop/test_data')
 REPORTS_DIR = TEST_DIR / 'reports'
 
-def load_json(path):
-    with open(path) as f:
-        return json.load(f)
-
 def main():
     chunks = load_json(REPORTS_DIR / 'rust_sim_chunks.json')
     improved_keep_ids = load_json(REPORTS_DIR / 'rust_improved_keep_ids.json')
     python_segments = load_json(REPORTS_DIR / 'segments.json')
     
     # Ground truth
-    should_keep = set()
-    for seg in python_segments:
-        seg_start = seg['raw_start_ms'] / 1000.0
-        seg_end = seg['raw_end_ms'] / 1000.0
-        
-        for chunk in chunks:
-            overlap_start = max(chunk['start'], seg_start)
-            overlap_end = min(chunk['end'], seg_end)
-            overlap_duration = max(0, overlap_end - overlap_start)
-            
-            chunk_duration = chunk['end'] - chunk['start']
-            overlap_ratio = overlap_duration / chunk_duration if chunk_duration > 0 else 0
-            
-            if overlap_ratio >= 0.5:
-                should_keep.add(chunk['id'])
+    should_keep = chunks_overlapping_segments(chunks, python_segments, ratio=0.5)
     
     improved_keep_set = set(improved_keep_ids)
     
@@ -6,13 +6,12 @@ Compare what the Rust/Claude pipeline kept vs what the Python/difflib pipeline k
 import json
 from pathlib import Path
 
+from json_utils import load_json
+from overlap_utils import chunks_overlapping_segments
+
 TEST_DIR = Path('/root/.openclaw/workspace/autotrim-desktop/test_data')
 REPORTS_DIR = TEST_DIR / 'reports'
 
-def load_json(path):
-    with open(path) as f:
-        return json.load(f)
-
 def main():
     # Load Rust chunks
     rust_chunks = load_json(REPORTS_DIR / 'rust_sim_chunks.json')
@@ -29,24 +28,8 @@ def main():
     # A Rust chunk should be kept if it overlaps significantly with any Python segment
     rust_keep_set = set(rust_keep_ids)
     
-    should_keep = set()
-    for seg in python_segments:
-        seg_start = seg['raw_start_ms'] / 1000.0
-        seg_end = seg['raw_end_ms'] / 1000.0
-        
-        # Find all chunks that overlap with this segment
-        for chunk in rust_chunks:
-            # Check if there's significant overlap
-            overlap_start = max(chunk['start'], seg_start)
-            overlap_end = min(chunk['end'], seg_end)
-            overlap_duration = max(0, overlap_end - overlap_start)
-            
-            chunk_duration = chunk['end'] - chunk['start']
-            overlap_ratio = overlap_duration / chunk_duration if chunk_duration > 0 else 0
-            
-            # If at least 50% of the chunk overlaps with the segment, it should be kept
-            if overlap_ratio >= 0.5:
-                should_keep.add(chunk['id'])
+    # If at least 50% of a chunk overlaps with a segment, it should be kept
+    should_keep = chunks_overlapping_segments(rust_chunks, python_segments, ratio=0.5)
     
     print(f"\nChunks that SHOULD be kept (based on Python): {len(should_keep)}")
     print(f"Chunks that Claude KEPT: {len(rust_keep_set)}")
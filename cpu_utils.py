@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Shared CPU count for sizing worker pools in the pipeline and analysis scripts.
+"""
+
+import os
+
+def cpu_count():
+    """CPUs this process may run on (respects affinity masks / container limits)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
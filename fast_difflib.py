@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+difflib for the alignment code: cydifflib when installed, the stdlib otherwise.
+
+cydifflib is a compiled drop-in for difflib (same matching blocks, much faster
+find_longest_match).
+"""
+
+try:
+    import cydifflib as difflib
+except ImportError:
+    import difflib
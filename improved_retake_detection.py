@@ -6,20 +6,37 @@ This script implements a more sophisticated retake detection algorithm
 that can catch retakes even when the speaker rephrases.
 """
 
-import json
-import re
+import functools
+from bisect import bisect_left
 from pathlib import Path
 from collections import Counter
-import difflib
+from concurrent.futures import ProcessPoolExecutor
+
+from cpu_utils import cpu_count
+from fast_difflib import difflib
+from json_utils import load_json
+from overlap_utils import chunks_overlapping_segments
 
 TEST_DIR = Path('/root/.openclaw/workspace/autotrim-desktop/test_data')
 REPORTS_DIR = TEST_DIR / 'reports'
 
+class _PunctTable(dict):
+    """
+    str.translate table deleting what r'[^\w\s]' matches. Filled lazily, one
+    entry per distinct character seen (word chars are alnum or '_').
+    """
+    def __missing__(self, code):
+        char = chr(code)
+        self[code] = code if char.isalnum() or char == '_' or char.isspace() else None
+        return self[code]
+
+_PUNCT = _PunctTable()
+
 def normalize_text(text):
     """Normalize text for comparison."""
     text = text.lower()
     # Remove punctuation
-    text = re.sub(r'[^\w\s]', '', text)
+    text = text.translate(_PUNCT)
     # Normalize whitespace
     text = ' '.join(text.split())
     return text
@@ -46,55 +63,176 @@ def sequence_matcher_similarity(text1, text2):
     """Use difflib to calculate sequence similarity."""
     return difflib.SequenceMatcher(None, normalize_text(text1), normalize_text(text2)).ratio()
 
-def detect_retake_groups_advanced(chunks, time_window=180.0, min_similarity=0.28):
+# Chunk count above which the pair scan is split across worker processes
+PARALLEL_MIN_CHUNKS = 1000
+
+@functools.lru_cache(maxsize=8)
+def _window_ends(starts, ends, time_window):
+    """
+    For each chunk i, the index one past the last later chunk j that can be in
+    its time window (starts[j] - ends[i] <= time_window).
+    
+    With sorted starts (the usual case) this is found by binary search and the
+    window is exactly [i + 1, end). Otherwise it is n and callers keep
+    checking the window per pair.
+    """
+    n = len(starts)
+    if any(a > b for a, b in zip(starts, starts[1:])):
+        return (n,) * n
+    return tuple(
+        bisect_left(starts, True, i + 1, n, key=lambda start, end=ends[i]: start - end > time_window)
+        for i in range(n)
+    )
+
+def _similarity_rows(texts, starts, ends, time_window, window_end, floor, rows):
+    """
+    Similarities >= floor of each chunk i in rows against the later chunks in
+    its time window, as {(i, j): similarity}. Runs in worker processes too.
+    """
+    # Normalize each chunk and build its trigram set once, not per pair. Each
+    # set is an int bitmask over interned trigram ids, so an intersection is
+    # one AND plus a popcount. Trigrams are keyed by word ids (the same
+    # trigrams as get_ngrams) so interning hashes small ints, not strings.
+    norm_texts = [normalize_text(text) for text in texts]
+    word_vocab = {}
+    vocab = {}
+    ngram_masks = []
+    for text in norm_texts:
+        ids = [word_vocab.setdefault(word, len(word_vocab)) for word in text.split()]
+        mask = 0
+        for ngram in zip(ids, ids[1:], ids[2:]):
+            mask |= 1 << vocab.setdefault(ngram, len(vocab))
+        ngram_masks.append(mask)
+    ngram_counts = [mask.bit_count() for mask in ngram_masks]
+    # Character histograms: a cheap sketch bounding the sequence ratio from
+    # above (the same bound as SequenceMatcher.quick_ratio)
+    char_counts = [Counter(text) for text in norm_texts]
+    
+    sims = {}
+    for i in rows:
+        for j in range(i + 1, window_end[i]):
+            # Check if within time window (only needed for unsorted starts)
+            if starts[j] - ends[i] > time_window:
+                continue
+            
+            # Each score is skipped when a cheap upper bound keeps it under the floor
+            similarity = 0.0
+            
+            # Jaccard can't exceed the ratio of the two set sizes
+            count_i, count_j = ngram_counts[i], ngram_counts[j]
+            if count_i and count_j and min(count_i, count_j) / max(count_i, count_j) >= floor:
+                overlap = (ngram_masks[i] & ngram_masks[j]).bit_count()
+                similarity = overlap / (count_i + count_j - overlap)
+            
+            # Only pairs whose length and character bounds reach the floor and
+            # could beat the current score get the full (exact) sequence ratio
+            text_i, text_j = norm_texts[i], norm_texts[j]
+            length = len(text_i) + len(text_j)
+            if not length:
+                similarity = 1.0  # two empty texts: ratio 1.0
+            else:
+                upper = 2.0 * min(len(text_i), len(text_j)) / length
+                if upper >= floor and upper > similarity:
+                    upper = 2.0 * (char_counts[i] & char_counts[j]).total() / length
+                if upper >= floor and upper > similarity:
+                    similarity = max(similarity, difflib.SequenceMatcher(None, text_i, text_j).ratio())
+            
+            if similarity >= floor:
+                sims[i, j] = similarity
+    
+    return sims
+
+@functools.lru_cache(maxsize=8)
+def _pair_similarities(texts, starts, ends, time_window, floor):
+    """
+    Return {(i, j): similarity} for each chunk pair j > i within the time window
+    whose similarity (max of ngram_similarity and sequence_matcher_similarity)
+    is at least floor. Pairs below the floor are left out.
+    
+    Memoized on the chunk texts/times, so a threshold sweep scans pairs once.
+    Long transcripts are scanned in worker processes (difflib holds the GIL),
+    each taking every k-th row so early and late rows are spread evenly.
+    """
+    n = len(texts)
+    window_end = _window_ends(starts, ends, time_window)
+    workers = min(cpu_count(), n)
+    if workers <= 1 or n < PARALLEL_MIN_CHUNKS:
+        return _similarity_rows(texts, starts, ends, time_window, window_end, floor, range(n))
+    
+    sims = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _similarity_rows, texts, starts, ends, time_window, window_end, floor, range(k, n, workers)
+            )
+            for k in range(workers)
+        ]
+        for future in futures:
+            sims.update(future.result())
+    return sims
+
+def detect_retake_groups_advanced(chunks, time_window=180.0, min_similarity=0.28, similarity_floor=None):
     """
     Detect retake groups using content similarity.
     
+    Pair similarities are scored down to min_similarity. A threshold sweep
+    should pass its lowest threshold as similarity_floor on every call, so the
+    memoized pair scores are computed once and shared by all thresholds.
+    
     Returns list of retake groups, where each group is a list of chunk IDs
     that are retakes of each other. The LAST chunk in each group should be kept.
     """
+    # Column views of the chunk fields, read once instead of per pair
+    ids = [chunk['id'] for chunk in chunks]
+    starts = tuple(chunk['start'] for chunk in chunks)
+    ends = tuple(chunk['end'] for chunk in chunks)
+    
+    sims = _pair_similarities(
+        tuple(chunk['text'] for chunk in chunks),
+        starts,
+        ends,
+        time_window,
+        min_similarity if similarity_floor is None else min(similarity_floor, min_similarity),
+    )
+    
+    window_end = _window_ends(starts, ends, time_window)
+    
     retake_groups = []
     processed = set()
     
-    for i, chunk_i in enumerate(chunks):
-        if chunk_i['id'] in processed:
+    for i, id_i in enumerate(ids):
+        if id_i in processed:
             continue
         
         # Look for similar chunks that come AFTER this one within the time window
-        group = [chunk_i['id']]
+        group = [id_i]
         
-        for j in range(i + 1, len(chunks)):
-            chunk_j = chunks[j]
+        for j in range(i + 1, window_end[i]):
+            id_j = ids[j]
             
-            if chunk_j['id'] in processed:
+            if id_j in processed:
                 continue
             
-            # Check if within time window
-            if chunk_j['start'] - chunk_i['end'] > time_window:
+            # Check if within time window (only needed for unsorted starts)
+            if starts[j] - ends[i] > time_window:
                 break
             
-            # Calculate similarity
-            ngram_sim = ngram_similarity(chunk_i['text'], chunk_j['text'], n=3)
-            seq_sim = sequence_matcher_similarity(chunk_i['text'], chunk_j['text'])
-            
-            # Use max of the two similarities
-            similarity = max(ngram_sim, seq_sim)
-            
-            if similarity >= min_similarity:
-                group.append(chunk_j['id'])
-                processed.add(chunk_j['id'])
+            if sims.get((i, j), 0.0) >= min_similarity:
+                group.append(id_j)
+                processed.add(id_j)
         
         if len(group) > 1:
             retake_groups.append(group)
-            processed.add(chunk_i['id'])
+            processed.add(id_i)
     
     return retake_groups
 
-def build_advanced_hints(chunks):
+def build_advanced_hints(chunks, similarity_floor=None):
     """
     Build retake hints using advanced detection.
     """
-    retake_groups = detect_retake_groups_advanced(chunks, time_window=180.0, min_similarity=0.35)
+    retake_groups = detect_retake_groups_advanced(chunks, time_window=180.0, min_similarity=0.35,
+                                                  similarity_floor=similarity_floor)
     
     if not retake_groups:
         return ""
@@ -140,21 +278,7 @@ def analyze_detection_quality(chunks, python_segments):
     algorithmic_keep = set(range(len(chunks))) - remove_set
     
     # Ground truth: map Python segments to chunks
-    should_keep = set()
-    for seg in python_segments:
-        seg_start = seg['raw_start_ms'] / 1000.0
-        seg_end = seg['raw_end_ms'] / 1000.0
-        
-        for chunk in chunks:
-            overlap_start = max(chunk['start'], seg_start)
-            overlap_end = min(chunk['end'], seg_end)
-            overlap_duration = max(0, overlap_end - overlap_start)
-            
-            chunk_duration = chunk['end'] - chunk['start']
-            overlap_ratio = overlap_duration / chunk_duration if chunk_duration > 0 else 0
-            
-            if overlap_ratio >= 0.5:
-                should_keep.add(chunk['id'])
+    should_keep = chunks_overlapping_segments(chunks, python_segments, ratio=0.5)
     
     # Compare
     correct_keeps = algorithmic_keep & should_keep
@@ -202,8 +326,8 @@ def analyze_detection_quality(chunks, python_segments):
 
 def main():
     # Load data
-    chunks = json.load(open(REPORTS_DIR / 'rust_sim_chunks.json'))
-    python_segments = json.load(open(REPORTS_DIR / 'segments.json'))
+    chunks = load_json(REPORTS_DIR / 'rust_sim_chunks.json')
+    python_segments = load_json(REPORTS_DIR / 'segments.json')
     
     print(f"Loaded {len(chunks)} chunks")
     print(f"Loaded {len(python_segments)} Python segments (ground truth)")
@@ -213,33 +337,21 @@ def main():
     print(f"TESTING DIFFERENT SIMILARITY THRESHOLDS")
     print(f"{'='*80}")
     
-    for threshold in [0.25, 0.30, 0.35, 0.40, 0.45]:
+    # Ground truth (doesn't depend on the threshold)
+    should_keep = chunks_overlapping_segments(chunks, python_segments, ratio=0.5)
+    
+    thresholds = [0.25, 0.30, 0.35, 0.40, 0.45]
+    for threshold in thresholds:
         print(f"\n--- Threshold: {threshold} ---")
         
-        retake_groups = detect_retake_groups_advanced(chunks, time_window=180.0, min_similarity=threshold)
+        retake_groups = detect_retake_groups_advanced(chunks, time_window=180.0, min_similarity=threshold,
+                                                      similarity_floor=min(thresholds))
         remove_set = set()
         for group in retake_groups:
             remove_set.update(group[:-1])
         
         algorithmic_keep = set(range(len(chunks))) - remove_set
         
-        # Ground truth
-        should_keep = set()
-        for seg in python_segments:
-            seg_start = seg['raw_start_ms'] / 1000.0
-            seg_end = seg['raw_end_ms'] / 1000.0
-            
-            for chunk in chunks:
-                overlap_start = max(chunk['start'], seg_start)
-                overlap_end = min(chunk['end'], seg_end)
-                overlap_duration = max(0, overlap_end - overlap_start)
-                
-                chunk_duration = chunk['end'] - chunk['start']
-                overlap_ratio = overlap_duration / chunk_duration if chunk_duration > 0 else 0
-                
-                if overlap_ratio >= 0.5:
-                    should_keep.add(chunk['id'])
-        
         correct_keeps = algorithmic_keep & should_keep
         false_positives = algorithmic_keep - should_keep
         false_negatives = should_keep - algorithmic_keep
@@ -259,7 +371,7 @@ def main():
     print(f"GENERATING HINTS WITH THRESHOLD 0.35")
     print(f"{'='*80}")
     
-    hints = build_advanced_hints(chunks)
+    hints = build_advanced_hints(chunks, similarity_floor=min(thresholds))
     
     # Save hints
     hints_path = REPORTS_DIR / 'advanced_retake_hints.txt'
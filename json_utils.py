@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Shared JSON loading/saving for the pipeline and analysis scripts.
+
+orjson parses and writes the transcriptions and reports much faster, so it is
+used when installed; the stdlib json module is the fallback.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def load_json(path):
+    """Parse a JSON file, via orjson when available."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def save_json(path, obj, ensure_ascii=True):
+    """
+    Write obj as JSON indented by 2 spaces, via orjson when available.
+
+    orjson always writes UTF-8; ensure_ascii only applies to the json fallback.
+    """
+    if orjson:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w') as f:
+            json.dump(obj, f, indent=2, ensure_ascii=ensure_ascii)
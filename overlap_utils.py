@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Shared ground-truth mapping between Python pipeline segments and Rust chunks.
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+def chunks_overlapping_segments(chunks, segments, ratio=0.5):
+    """
+    Return the ids of the chunks that should be kept according to the Python
+    segments: those with at least `ratio` of their duration covered by a
+    single segment.
+    
+    Chunk times are in seconds, segment times in ms (raw_start_ms/raw_end_ms).
+    
+    Sweep over segments sorted by start: for each chunk, binary search the
+    first segment that can reach past the chunk start (running max of ends)
+    and the last one starting before the chunk end, and only test those.
+    """
+    seg_intervals = sorted((seg['raw_start_ms'] / 1000.0, seg['raw_end_ms'] / 1000.0) for seg in segments)
+    seg_starts = [start for start, _ in seg_intervals]
+    reach = list(accumulate((end for _, end in seg_intervals), max))
+    
+    should_keep = set()
+    for chunk in chunks:
+        chunk_start, chunk_end = chunk['start'], chunk['end']
+        if ratio <= 0:
+            # Even a zero overlap qualifies, including for zero-duration chunks
+            # (whose overlap ratio counts as 0)
+            if seg_intervals:
+                should_keep.add(chunk['id'])
+            continue
+        
+        chunk_duration = chunk_end - chunk_start
+        if chunk_duration <= 0:
+            continue
+        
+        # Segments outside [lo, hi) end before the chunk starts or start after
+        # it ends, so their overlap is zero
+        lo = bisect_right(reach, chunk_start)
+        hi = bisect_left(seg_starts, chunk_end)
+        for seg_start, seg_end in seg_intervals[lo:hi]:
+            overlap_duration = max(0, min(chunk_end, seg_end) - max(chunk_start, seg_start))
+            if overlap_duration / chunk_duration >= ratio:
+                should_keep.add(chunk['id'])
+                break
+    
+    return should_keep
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Importing this module puts the repo root on sys.path, so the test_data scripts
+(run from test_data/) can import the shared root modules such as json_utils.
+"""
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
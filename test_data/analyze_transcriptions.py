@@ -1,25 +1,78 @@
 #!/usr/bin/env python3
 """
 Detailed analysis of output vs expected transcriptions to identify problematic passages.
+
+Usage:
+    python analyze_transcriptions.py                      # output/expected_transcription.json
+    python analyze_transcriptions.py OUT EXP [OUT EXP...]  # batch, one process per pair
 """
-import json
-import difflib
+import functools
+import os
 import re
+import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from heapq import nlargest
+from operator import itemgetter
+
+import _paths  # noqa: F401
+from cpu_utils import cpu_count
+from fast_difflib import difflib
+from json_utils import load_json, save_json
+
+# ijson streams the word list without building the rest of the document
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
+# Characters normalize_word strips, compiled once instead of per word
+_NORM_RE = re.compile(r'[^a-z0-9àâäéèêëïîôùûüÿçœæ]')
+
+# ASCII characters the regex strips (everything but letters and digits)
+_ASCII_STRIP = str.maketrans('', '', ''.join(chr(c) for c in range(128) if not chr(c).isalnum()))
+
+# Memoized: transcripts repeat a small vocabulary many times over
+@functools.lru_cache(maxsize=None)
 def normalize_word(text):
     """Normalize a word for matching: lowercase, strip punctuation."""
-    return re.sub(r'[^a-z0-9àâäéèêëïîôùûüÿçœæ]', '', text.lower())
+    # Plain ASCII alphanumerics (most words) have nothing to strip; other
+    # ASCII words only need the table, the regex is left for accented text
+    if text.isascii():
+        if text.isalnum() and text.islower():
+            return text
+        return text.lower().translate(_ASCII_STRIP)
+    return _NORM_RE.sub('', text.lower())
 
 def load_transcription(path):
     """Load an AssemblyAI transcription JSON file."""
-    with open(path) as f:
-        return json.load(f)
+    return load_json(path)
 
 def get_words(transcription):
     """Extract word list from transcription."""
     return transcription.get('words', [])
 
+def load_words(path):
+    """
+    Load just the words of a transcription, each reduced to text/start/end
+    (the only fields the analysis reads). Streamed with ijson when installed.
+    """
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            words = ijson.items(f, 'words.item', use_float=True)
+            return [{'text': w['text'], 'start': w['start'], 'end': w['end']} for w in words]
+    words = get_words(load_transcription(path))
+    return [{'text': w['text'], 'start': w['start'], 'end': w['end']} for w in words]
+
+def word_opcodes(a, b):
+    """
+    SequenceMatcher(None, a, b, autojunk=False).get_opcodes(), without running
+    the matcher at all when the two lists are identical.
+    """
+    if a == b:
+        return [('equal', 0, len(a), 0, len(b))] if a else []
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+
 def format_time(ms):
     """Format milliseconds as MM:SS.mmm"""
     secs = ms / 1000.0
@@ -32,98 +85,109 @@ def analyze_alignment(output_words, expected_words):
     Detailed alignment between output and expected.
     Returns problematic passages.
     """
-    out_texts = [normalize_word(w['text']) for w in output_words]
-    exp_texts = [normalize_word(w['text']) for w in expected_words]
+    return analyze(output_words, expected_words)[1]
+
+def problem_spans(opcodes, min_words=5):
+    """
+    Classify word-level opcodes using index arithmetic only.
+    Returns (extra, missing, out_of_order): (i1, i2, replaced) spans of at
+    least min_words in output/expected, and (o1, o2, e1, e2) equal runs that
+    go back in expected.
+    """
+    extra, missing, out_of_order = [], [], []
+    last_exp_idx = -1
     
-    sm = difflib.SequenceMatcher(None, out_texts, exp_texts, autojunk=False)
+    for opcode, o1, o2, e1, e2 in opcodes:
+        if opcode == 'equal':
+            if e1 < last_exp_idx:
+                out_of_order.append((o1, o2, e1, e2))
+            if e2 > last_exp_idx:
+                last_exp_idx = e2
+        else:
+            # delete has an empty expected side and insert an empty output
+            # side; replace can be a problem on either
+            replaced = opcode == 'replace'
+            if o2 - o1 >= min_words:
+                extra.append((o1, o2, replaced))
+            if e2 - e1 >= min_words:
+                missing.append((e1, e2, replaced))
     
-    problems = {
-        'extra_in_output': [],  # Passages in output that shouldn't be there
-        'missing_from_output': [],  # Passages from expected that are missing
-        'out_of_order': []  # Passages in wrong order
+    return extra, missing, out_of_order
+
+def passage(side, words, texts, i1, i2, replaced):
+    """Problem dict for words[i1:i2] on the 'output' or 'expected' side."""
+    p = {
+        f'{side}_range': (i1, i2),
+        'word_count': i2 - i1,
+        f'{side}_text': ' '.join(texts[i1:min(i2, i1+20)]),
+        f'{side}_time': f"{format_time(words[i1]['start'])} - {format_time(words[i2-1]['end'])}",
+        'duration_s': (words[i2-1]['end'] - words[i1]['start']) / 1000.0
     }
+    if replaced:
+        p['note'] = 'replaced content'
+    return p
+
+def find_problems(opcodes, output_words, expected_words):
+    """Problematic passages from the word-level opcodes of output vs expected."""
+    extra, missing, out_of_order = problem_spans(opcodes)
     
-    last_exp_idx = -1
+    # Text columns, so previews are slice joins
+    output_texts = [w['text'] for w in output_words]
+    expected_texts = [w['text'] for w in expected_words]
     
-    for opcode, o1, o2, e1, e2 in sm.get_opcodes():
-        if opcode == 'equal':
-            # Check for out-of-order
-            if e1 < last_exp_idx:
-                problems['out_of_order'].append({
-                    'output_range': (o1, o2),
-                    'expected_range': (e1, e2),
-                    'output_text': ' '.join([output_words[i]['text'] for i in range(o1, min(o2, o1+10))]),
-                    'output_time': f"{format_time(output_words[o1]['start'])} - {format_time(output_words[o2-1]['end'])}" if o1 < o2 else "empty"
-                })
-            last_exp_idx = max(last_exp_idx, e2)
-        
-        elif opcode == 'delete':
-            # Extra content in output (should have been removed)
-            if o2 - o1 >= 5:  # Only report if >= 5 words
-                problems['extra_in_output'].append({
-                    'output_range': (o1, o2),
-                    'word_count': o2 - o1,
-                    'output_text': ' '.join([output_words[i]['text'] for i in range(o1, min(o2, o1+20))]),
-                    'output_time': f"{format_time(output_words[o1]['start'])} - {format_time(output_words[o2-1]['end'])}",
-                    'duration_s': (output_words[o2-1]['end'] - output_words[o1]['start']) / 1000.0
-                })
-        
-        elif opcode == 'insert':
-            # Missing content from output (should have been kept)
-            if e2 - e1 >= 5:  # Only report if >= 5 words
-                problems['missing_from_output'].append({
-                    'expected_range': (e1, e2),
-                    'word_count': e2 - e1,
-                    'expected_text': ' '.join([expected_words[i]['text'] for i in range(e1, min(e2, e1+20))]),
-                    'expected_time': f"{format_time(expected_words[e1]['start'])} - {format_time(expected_words[e2-1]['end'])}",
-                    'duration_s': (expected_words[e2-1]['end'] - expected_words[e1]['start']) / 1000.0
-                })
-        
-        elif opcode == 'replace':
-            # Different content - could be either problem
-            if o2 - o1 >= 5:
-                problems['extra_in_output'].append({
-                    'output_range': (o1, o2),
-                    'word_count': o2 - o1,
-                    'output_text': ' '.join([output_words[i]['text'] for i in range(o1, min(o2, o1+20))]),
-                    'output_time': f"{format_time(output_words[o1]['start'])} - {format_time(output_words[o2-1]['end'])}",
-                    'duration_s': (output_words[o2-1]['end'] - output_words[o1]['start']) / 1000.0,
-                    'note': 'replaced content'
-                })
-            if e2 - e1 >= 5:
-                problems['missing_from_output'].append({
-                    'expected_range': (e1, e2),
-                    'word_count': e2 - e1,
-                    'expected_text': ' '.join([expected_words[i]['text'] for i in range(e1, min(e2, e1+20))]),
-                    'expected_time': f"{format_time(expected_words[e1]['start'])} - {format_time(expected_words[e2-1]['end'])}",
-                    'duration_s': (expected_words[e2-1]['end'] - expected_words[e1]['start']) / 1000.0,
-                    'note': 'replaced content'
-                })
-    
-    return problems
+    return {
+        # Passages in output that shouldn't be there
+        'extra_in_output': [passage('output', output_words, output_texts, *span) for span in extra],
+        # Passages from expected that are missing
+        'missing_from_output': [passage('expected', expected_words, expected_texts, *span) for span in missing],
+        # Passages in wrong order
+        'out_of_order': [{
+            'output_range': (o1, o2),
+            'expected_range': (e1, e2),
+            'output_text': ' '.join(output_texts[o1:min(o2, o1+10)]),
+            'output_time': f"{format_time(output_words[o1]['start'])} - {format_time(output_words[o2-1]['end'])}" if o1 < o2 else "empty"
+        } for o1, o2, e1, e2 in out_of_order]
+    }
 
 def calculate_similarity(output_words, expected_words):
     """Calculate word-level similarity."""
-    out_texts = [normalize_word(w['text']) for w in output_words]
-    exp_texts = [normalize_word(w['text']) for w in expected_words]
-    
-    sm = difflib.SequenceMatcher(None, out_texts, exp_texts, autojunk=False)
-    matches = sum(block.size for block in sm.get_matching_blocks())
-    
-    precision = matches / len(out_texts) if out_texts else 0
-    recall = matches / len(exp_texts) if exp_texts else 0
+    return analyze(output_words, expected_words)[0]
+
+def similarity_stats(matches, n_out, n_exp):
+    """Precision/recall/F1 of `matches` aligned words between n_out output and n_exp expected words."""
+    precision = matches / n_out if n_out else 0
+    recall = matches / n_exp if n_exp else 0
     f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
     
     return {
         'matches': matches,
-        'output_words': len(out_texts),
-        'expected_words': len(exp_texts),
+        'output_words': n_out,
+        'expected_words': n_exp,
         'precision': precision,
         'recall': recall,
         'f1': f1,
-        'similarity_pct': (matches / max(len(out_texts), len(exp_texts))) * 100 if max(len(out_texts), len(exp_texts)) > 0 else 0
+        'similarity_pct': (matches / max(n_out, n_exp)) * 100 if max(n_out, n_exp) > 0 else 0
     }
 
+def analyze(output_words, expected_words):
+    """
+    Similarity stats and problematic passages from a single alignment:
+    words are normalized and diffed once, and the matches are the equal runs.
+    Returns (similarity, problems).
+    
+    Normalized words are interned to small ints first, so the matcher hashes
+    and compares ints instead of strings (the alignment is the same).
+    """
+    vocab = {}
+    out_ids = [vocab.setdefault(normalize_word(w['text']), len(vocab)) for w in output_words]
+    exp_ids = [vocab.setdefault(normalize_word(w['text']), len(vocab)) for w in expected_words]
+    
+    opcodes = word_opcodes(out_ids, exp_ids)
+    matches = sum(o2 - o1 for tag, o1, o2, _, _ in opcodes if tag == 'equal')
+    
+    sim = similarity_stats(matches, len(out_ids), len(exp_ids))
+    return sim, find_problems(opcodes, output_words, expected_words)
+
 def main():
     print("=" * 80)
     print("TRANSCRIPTION ANALYSIS - Output vs Expected")
@@ -132,11 +196,8 @@ def main():
     
     # Load transcriptions
     print("Loading transcriptions...")
-    output_trans = load_transcription('output_transcription.json')
-    expected_trans = load_transcription('expected_transcription.json')
-    
-    output_words = get_words(output_trans)
-    expected_words = get_words(expected_trans)
+    output_words = load_words('output_transcription.json')
+    expected_words = load_words('expected_transcription.json')
     
     output_duration = output_words[-1]['end'] / 1000.0 if output_words else 0
     expected_duration = expected_words[-1]['end'] / 1000.0 if expected_words else 0
@@ -145,9 +206,9 @@ def main():
     print(f"Expected: {len(expected_words)} words, duration: {expected_duration/60:.2f} min")
     print()
     
-    # Calculate similarity
+    # Calculate similarity (the same alignment gives the problem passages below)
     print("Calculating similarity...")
-    sim = calculate_similarity(output_words, expected_words)
+    sim, problems = analyze(output_words, expected_words)
     print(f"Word matches: {sim['matches']} / {sim['expected_words']}")
     print(f"Precision: {sim['precision']*100:.2f}%")
     print(f"Recall: {sim['recall']*100:.2f}%")
@@ -157,7 +218,6 @@ def main():
     
     # Analyze alignment
     print("Analyzing alignment (this may take a while)...")
-    problems = analyze_alignment(output_words, expected_words)
     
     # Report problems
     print("=" * 80)
@@ -174,7 +234,7 @@ def main():
     print()
     if extra:
         print("   Top 10 longest:")
-        for i, p in enumerate(sorted(extra, key=lambda x: x['duration_s'], reverse=True)[:10], 1):
+        for i, p in enumerate(nlargest(10, extra, key=itemgetter('duration_s')), 1):
             note = f" [{p['note']}]" if 'note' in p else ""
             print(f"   {i}. {p['output_time']} ({p['duration_s']:.1f}s, {p['word_count']} words){note}")
             print(f"      {p['output_text'][:120]}...")
@@ -189,7 +249,7 @@ def main():
     print()
     if missing:
         print("   Top 10 longest:")
-        for i, p in enumerate(sorted(missing, key=lambda x: x['duration_s'], reverse=True)[:10], 1):
+        for i, p in enumerate(nlargest(10, missing, key=itemgetter('duration_s')), 1):
             note = f" [{p['note']}]" if 'note' in p else ""
             print(f"   {i}. {p['expected_time']} ({p['duration_s']:.1f}s, {p['word_count']} words){note}")
             print(f"      {p['expected_text'][:120]}...")
@@ -221,22 +281,68 @@ def main():
     print()
     
     # Save detailed report
-    report = {
-        'similarity': sim,
-        'problems': {
-            'extra_in_output': extra,
-            'missing_from_output': missing,
-            'out_of_order': ooo
-        }
-    }
-    
-    with open('reports/detailed_analysis.json', 'w') as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
+    save_json('reports/detailed_analysis.json', {'similarity': sim, 'problems': problems}, ensure_ascii=False)
     
     print("Detailed report saved to: reports/detailed_analysis.json")
     print()
     
     return sim['similarity_pct']
 
+def report_paths(output_paths):
+    """
+    Report path for each output in a batch: reports/detailed_analysis_<name>.json,
+    <name> being the output file name without extension. Outputs sharing a file
+    name (runA/output.json, runB/output.json) get their directory name prefixed,
+    and any name still shared gets the pair index appended, so no two pairs
+    write the same report.
+    """
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in output_paths]
+    names = [
+        f"{os.path.basename(os.path.dirname(os.path.abspath(p)))}_{stem}" if stems.count(stem) > 1 else stem
+        for p, stem in zip(output_paths, stems)
+    ]
+    names = [f"{name}_{i}" if names.count(name) > 1 else name for i, name in enumerate(names)]
+    return [f'reports/detailed_analysis_{name}.json' for name in names]
+
+def analyze_pair(output_path, expected_path, report_path):
+    """
+    Analyze one output/expected pair and save its report to report_path (see
+    report_paths). Returns a summary dict.
+    """
+    output_words = load_words(output_path)
+    expected_words = load_words(expected_path)
+    sim, problems = analyze(output_words, expected_words)
+    
+    save_json(report_path, {'similarity': sim, 'problems': problems}, ensure_ascii=False)
+    return {
+        'output': output_path,
+        'expected': expected_path,
+        'report': report_path,
+        'similarity_pct': sim['similarity_pct'],
+        'extra_in_output': len(problems['extra_in_output']),
+        'missing_from_output': len(problems['missing_from_output']),
+        'out_of_order': len(problems['out_of_order']),
+    }
+
+def main_batch(pairs):
+    """Analyze several (output, expected) pairs, one worker process per pair."""
+    outputs, expecteds = zip(*pairs)
+    workers = min(len(pairs), cpu_count())
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        results = list(ex.map(analyze_pair, outputs, expecteds, report_paths(outputs)))
+    
+    for r in results:
+        print(f"{r['similarity_pct']:6.2f}%  {r['output']} vs {r['expected']}: "
+              f"{r['extra_in_output']} extra, {r['missing_from_output']} missing, "
+              f"{r['out_of_order']} out of order -> {r['report']}")
+    return results
+
 if __name__ == '__main__':
-    main()
+    args = sys.argv[1:]
+    if not args:
+        main()
+    elif len(args) % 2:
+        print("Expected OUTPUT EXPECTED path pairs")
+        sys.exit(1)
+    else:
+        main_batch(list(zip(args[::2], args[1::2])))
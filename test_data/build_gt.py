@@ -3,110 +3,113 @@
 Build a precise ground truth mapping between raw and expected transcriptions.
 Figure out which raw words/time ranges map to which expected words.
 """
-import json
-import difflib
+import functools
 import re
+from bisect import bisect_left, bisect_right
 
-def normalize(s):
-    return re.sub(r'[^a-z0-9àâäéèêëïîôùûüçœæ]', '', s.lower())
+import _paths  # noqa: F401
+from fast_difflib import difflib
+from json_utils import load_json, save_json
+
+# Characters normalize strips, compiled once instead of per word
+_NORM_RE = re.compile(r'[^a-z0-9àâäéèêëïîôùûüçœæ]')
 
-with open('raw_transcription.json') as f:
-    raw = json.load(f)
-with open('expected_transcription.json') as f:
-    exp = json.load(f)
+# ASCII characters the regex strips (everything but letters and digits)
+_ASCII_STRIP = str.maketrans('', '', ''.join(chr(c) for c in range(128) if not chr(c).isalnum()))
+
+# Memoized: transcripts repeat a small vocabulary many times over
+@functools.lru_cache(maxsize=None)
+def normalize(s):
+    # Plain ASCII alphanumerics (most words) have nothing to strip; other
+    # ASCII words only need the table, the regex is left for accented text
+    if s.isascii():
+        if s.isalnum() and s.islower():
+            return s
+        return s.lower().translate(_ASCII_STRIP)
+    return _NORM_RE.sub('', s.lower())
+
+def word_matching_blocks(a, b):
+    """
+    SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks(), without
+    running the matcher at all when the two lists are identical.
+
+    The ground truth is defined by exactly these blocks, so this deliberately
+    runs plain SequenceMatcher on the full lists: prefix/suffix trimming or an
+    LCS/edit-distance aligner (edlib, rapidfuzz) can place matches differently
+    among repeats, which moves KEEP/REMOVE boundaries.
+    """
+    if a == b:
+        return ([difflib.Match(0, 0, len(a))] if a else []) + [difflib.Match(len(a), len(b), 0)]
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks()
+
+raw = load_json('raw_transcription.json')
+exp = load_json('expected_transcription.json')
 
 raw_words = raw['words']
 exp_words = exp['words']
 
-# Align raw and expected words using SequenceMatcher
-raw_texts = [normalize(w['text']) for w in raw_words]
-exp_texts = [normalize(w['text']) for w in exp_words]
+# Align raw and expected words using SequenceMatcher, on normalized words
+# interned to small ints (cheaper to hash and compare than strings)
+vocab = {}
+raw_ids = [vocab.setdefault(normalize(w['text']), len(vocab)) for w in raw_words]
+exp_ids = [vocab.setdefault(normalize(w['text']), len(vocab)) for w in exp_words]
 
 print("Computing alignment...")
-sm = difflib.SequenceMatcher(None, raw_texts, exp_texts, autojunk=False)
-matching_blocks = sm.get_matching_blocks()
+matching_blocks = word_matching_blocks(raw_ids, exp_ids)
 
 # Mark which raw word indices are "kept"
-kept_raw_indices = set()
+kept = bytearray(len(raw_words))  # 1 where the raw word survives into the edit
 for block in matching_blocks:
     if block.size >= 2:
-        for i in range(block.a, block.a + block.size):
-            kept_raw_indices.add(i)
+        kept[block.a:block.a + block.size] = b'\x01' * block.size
 
-print(f"Matched {len(kept_raw_indices)}/{len(raw_words)} raw words")
+print(f"Matched {kept.count(1)}/{len(raw_words)} raw words")
 
-# Find contiguous "kept" and "removed" ranges in raw
-ranges = []  # (type, start_idx, end_idx, start_time, end_time, text_preview)
-current_type = None
+# Find contiguous "kept" and "removed" ranges in raw: each run ends where the
+# mask first flips, so jump there with find() instead of testing every word.
+# Runs are merged as they are found: a small gap (< 3 words) removed after a
+# KEEP is usually a word missed by the alignment, so it is absorbed into that
+# KEEP, and the KEEP run that follows extends it as well.
+final = []  # (type, start_idx, end_idx, start_time, end_time)
 range_start = 0
-
-for i in range(len(raw_words)):
-    is_kept = i in kept_raw_indices
-    new_type = 'KEEP' if is_kept else 'REMOVE'
+while range_start < len(raw_words):
+    is_kept = kept[range_start]
+    range_end = kept.find(1 - is_kept, range_start)
+    if range_end == -1:
+        range_end = len(raw_words)
+    last = range_end - 1
     
-    if new_type != current_type:
-        if current_type is not None:
-            ranges.append((current_type, range_start, i-1, 
-                          raw_words[range_start]['start']/1000, 
-                          raw_words[i-1]['end']/1000))
-        current_type = new_type
-        range_start = i
-
-if current_type is not None:
-    ranges.append((current_type, range_start, len(raw_words)-1,
-                  raw_words[range_start]['start']/1000,
-                  raw_words[-1]['end']/1000))
-
-# Merge small gaps (< 3 words) in KEEP ranges
-# Sometimes a word is missed in alignment but the surrounding area is kept
-merged = []
-for r in ranges:
-    if merged and r[0] == merged[-1][0]:
-        # Same type, merge
-        merged[-1] = (r[0], merged[-1][1], r[2], merged[-1][3], r[4])
-    elif merged and r[0] == 'REMOVE' and (r[2] - r[1]) < 3:
-        # Tiny remove gap - check if surrounded by keeps
-        if len(merged) >= 1 and merged[-1][0] == 'KEEP':
-            # Merge into previous keep
-            merged[-1] = ('KEEP', merged[-1][1], r[2], merged[-1][3], r[4])
-    else:
-        merged.append(r)
-
-# Re-merge adjacent same-type
-final = [merged[0]]
-for r in merged[1:]:
-    if r[0] == final[-1][0]:
-        final[-1] = (r[0], final[-1][1], r[2], final[-1][3], r[4])
+    if final and final[-1][0] == 'KEEP' and (is_kept or last - range_start < 3):
+        final[-1] = ('KEEP', final[-1][1], last, final[-1][3], raw_words[last]['end']/1000)
     else:
-        final.append(r)
-
-# Now build chunks
+        final.append(('KEEP' if is_kept else 'REMOVE', range_start, last,
+                      raw_words[range_start]['start']/1000,
+                      raw_words[last]['end']/1000))
+    range_start = range_end
+
+# Now build chunks: split after every word followed by a pause >= 500ms.
+# The pauses come from start/end columns in one pass, then each chunk is a slice.
+starts = [w['start'] for w in raw_words]
+ends = [w['end'] for w in raw_words]
+chunk_ends = [i + 1 for i, (end, next_start) in enumerate(zip(ends, starts[1:])) if next_start - end >= 500]
+if raw_words:
+    chunk_ends.append(len(raw_words))
+
+# Chunks keep their raw word span (word_start:word_end) rather than a copy of
+# the words; raw_words[word_start:word_end] gives them back when needed.
 chunks = []
-current = []
-for i, w in enumerate(raw_words):
-    current.append(w)
-    gap = raw_words[i+1]['start'] - w['end'] if i+1 < len(raw_words) else 99999
-    if gap >= 500 and current:
-        text = ' '.join(ww['text'] for ww in current)
-        chunks.append({
-            'id': len(chunks),
-            'text': text,
-            'start': current[0]['start'] / 1000,
-            'end': current[-1]['end'] / 1000,
-            'word_count': len(current),
-            'words': current[:],
-        })
-        current = []
-if current:
-    text = ' '.join(ww['text'] for ww in current)
+chunk_start = 0
+for chunk_end in chunk_ends:
     chunks.append({
         'id': len(chunks),
-        'text': text,
-        'start': current[0]['start'] / 1000,
-        'end': current[-1]['end'] / 1000,
-        'word_count': len(current),
-        'words': current[:],
+        'text': ' '.join(ww['text'] for ww in raw_words[chunk_start:chunk_end]),
+        'start': starts[chunk_start] / 1000,
+        'end': ends[chunk_end - 1] / 1000,
+        'word_count': chunk_end - chunk_start,
+        'word_start': chunk_start,
+        'word_end': chunk_end,
     })
+    chunk_start = chunk_end
 
 # Print the keep/remove ranges with their time ranges
 print(f"\n{'='*80}")
@@ -130,12 +133,6 @@ print(f"\nTotal keep time: {total_keep_time:.0f}s = {total_keep_time/60:.1f}min"
 print(f"Total remove time: {total_remove_time:.0f}s = {total_remove_time/60:.1f}min")
 
 # For each chunk, determine if it's keep or remove
-raw_word_lookup = {}
-for idx, w in enumerate(raw_words):
-    key = (w['start'], w['text'])
-    if key not in raw_word_lookup:
-        raw_word_lookup[key] = idx
-
 print(f"\n{'='*80}")
 print(f"CHUNK LABELS")
 print(f"{'='*80}")
@@ -145,14 +142,9 @@ remove_areas = []
 current_area = []
 
 for chunk in chunks:
-    indices = [raw_word_lookup.get((w['start'], w['text'])) for w in chunk['words']]
-    indices = [i for i in indices if i is not None]
-    if not indices:
-        label = 'REMOVE'
-    else:
-        kept_count = sum(1 for idx in indices if idx in kept_raw_indices)
-        keep_ratio = kept_count / len(indices)
-        label = 'KEEP' if keep_ratio > 0.5 else 'REMOVE'
+    kept_count = kept.count(1, chunk['word_start'], chunk['word_end'])
+    keep_ratio = kept_count / chunk['word_count']
+    label = 'KEEP' if keep_ratio > 0.5 else 'REMOVE'
     
     chunk['label'] = label
     
@@ -171,7 +163,33 @@ for chunk in chunks:
 if current_area:
     remove_areas.append(current_area)
 
-# Print remove areas with context
+# Print remove areas with context. Chunks normally come out in time order, so
+# the nearest KEEP chunk on either side of an area is a bisect away; raw word
+# timestamps can overlap slightly though, so scan when the times aren't sorted.
+keep_chunks = [c for c in chunks if c['label'] == 'KEEP']
+keep_starts = [c['start'] for c in keep_chunks]
+keep_ends = [c['end'] for c in keep_chunks]
+keep_sorted = (all(a <= b for a, b in zip(keep_starts, keep_starts[1:])) and
+               all(a <= b for a, b in zip(keep_ends, keep_ends[1:])))
+
+def keep_before(t):
+    """Last KEEP chunk ending at or before t."""
+    if keep_sorted:
+        i = bisect_right(keep_ends, t) - 1
+        return keep_chunks[i] if i >= 0 else None
+    before = None
+    for c in keep_chunks:
+        if c['end'] <= t:
+            before = c
+    return before
+
+def keep_after(t):
+    """First KEEP chunk starting at or after t."""
+    if keep_sorted:
+        j = bisect_left(keep_starts, t)
+        return keep_chunks[j] if j < len(keep_chunks) else None
+    return next((c for c in keep_chunks if c['start'] >= t), None)
+
 print(f"\nFound {len(remove_areas)} remove areas:")
 for area in remove_areas:
     first = area[0]
@@ -179,13 +197,8 @@ for area in remove_areas:
     total_words = sum(c['word_count'] for c in area)
     
     # Find kept chunks before and after
-    before = None
-    after = None
-    for c in chunks:
-        if c['end'] <= first['start'] and c['label'] == 'KEEP':
-            before = c
-        if c['start'] >= last['end'] and c['label'] == 'KEEP' and after is None:
-            after = c
+    before = keep_before(first['start'])
+    after = keep_after(last['end'])
     
     print(f"\n  REMOVE AREA: {first['start']:.1f}-{last['end']:.1f}s ({len(area)} chunks, {total_words}w)")
     if before:
@@ -197,6 +210,5 @@ for area in remove_areas:
 
 # Save ground truth
 gt = {chunk['id']: chunk['label'] for chunk in chunks}
-with open('reports/ground_truth.json', 'w') as f:
-    json.dump(gt, f, indent=2)
+save_json('reports/ground_truth.json', gt)
 print(f"\nSaved ground truth to reports/ground_truth.json")
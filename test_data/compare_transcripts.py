@@ -1,20 +1,41 @@
 #!/usr/bin/env python3
 """Compare output transcription with expected transcription"""
-import json
-import difflib
+import functools
+import heapq
 import os
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
+import _paths  # noqa: F401
+from fast_difflib import difflib
+from json_utils import load_json, save_json
 
 def load_words(path):
     """Load word list from transcription JSON"""
-    with open(path) as f:
-        data = json.load(f)
+    data = load_json(path)
     words = data.get('words', [])
     return words
 
+# Punctuation trimmed from both ends of a word (inner apostrophes stay)
+_EDGE_PUNCT = '.,!?;:()[]"\''
+
 def extract_text_words(words):
     """Extract just the text from word objects, lowercased"""
-    return [w['text'].lower().strip('.,!?;:()[]"\'') for w in words if w.get('text', '').strip()]
+    return [w['text'].lower().strip(_EDGE_PUNCT) for w in words if w.get('text', '').strip()]
+
+@functools.lru_cache(maxsize=4096)
+def _pair_similar(exp_text, out_text, threshold):
+    """
+    Whether a replacement pair's character similarity (SequenceMatcher ratio)
+    exceeds threshold; the same ASR slips (the/a, ok/okay) recur a lot.
+    The ratio can't exceed 2*min(len)/(len_a + len_b), so pairs of very
+    different lengths are rejected without running the matcher.
+    """
+    total = len(exp_text) + len(out_text)
+    if total and 2.0 * min(len(exp_text), len(out_text)) / total <= threshold:
+        return False
+    return difflib.SequenceMatcher(None, exp_text, out_text).ratio() > threshold
 
 def format_time(ms):
     """Format milliseconds to mm:ss"""
@@ -46,8 +67,10 @@ def find_sentence_chunks(words, chunk_size=20):
 
 def main():
     print("Loading transcriptions...")
-    expected_words = load_words('expected_transcription.json')
-    output_words = load_words('output_transcription.json')
+    # The two files are independent: read/parse them on separate threads
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        expected_words, output_words = ex.map(load_words, ['expected_transcription.json',
+                                                           'output_transcription.json'])
     
     print(f"Expected: {len(expected_words)} words")
     print(f"Output: {len(output_words)} words")
@@ -61,10 +84,13 @@ def main():
     
     # Use SequenceMatcher for alignment
     print("\nComputing sequence alignment (this may take a moment)...")
-    sm = difflib.SequenceMatcher(None, exp_texts, out_texts, autojunk=False)
-    
-    matching_blocks = sm.get_matching_blocks()
-    total_matching = sum(block.size for block in matching_blocks)
+    # Words are interned to ints first: the matcher hashes and compares them
+    # constantly, and int equality is cheaper than string equality
+    vocab = {}
+    exp_ids = [vocab.setdefault(t, len(vocab)) for t in exp_texts]
+    out_ids = [vocab.setdefault(t, len(vocab)) for t in out_texts]
+    opcodes = difflib.SequenceMatcher(None, exp_ids, out_ids, autojunk=False).get_opcodes()
+    total_matching = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == 'equal')
     
     match_pct_exp = (total_matching / len(exp_texts)) * 100 if exp_texts else 0
     match_pct_out = (total_matching / len(out_texts)) * 100 if out_texts else 0
@@ -73,8 +99,13 @@ def main():
     print(f"Match % (of expected): {match_pct_exp:.1f}%")
     print(f"Match % (of output): {match_pct_out:.1f}%")
     
-    # Get opcodes for detailed diff
-    opcodes = sm.get_opcodes()
+    # Word columns, so each diff segment is a slice join and two index lookups
+    exp_word_texts = [w['text'] for w in expected_words]
+    exp_starts = [w.get('start', 0) for w in expected_words]
+    exp_ends = [w.get('end', 0) for w in expected_words]
+    out_word_texts = [w['text'] for w in output_words]
+    out_starts = [w.get('start', 0) for w in output_words]
+    out_ends = [w.get('end', 0) for w in output_words]
     
     # Categorize differences
     missing_from_output = []  # In expected but not in output
@@ -86,10 +117,9 @@ def main():
             continue
         elif tag == 'delete':
             # Words in expected missing from output
-            exp_segment = expected_words[i1:i2]
-            text = ' '.join(w['text'] for w in exp_segment)
-            start = exp_segment[0].get('start', 0) if exp_segment else 0
-            end = exp_segment[-1].get('end', 0) if exp_segment else 0
+            text = ' '.join(exp_word_texts[i1:i2])
+            start = exp_starts[i1] if i1 < i2 else 0
+            end = exp_ends[i2-1] if i1 < i2 else 0
             missing_from_output.append({
                 'text': text,
                 'word_count': i2 - i1,
@@ -99,10 +129,9 @@ def main():
             })
         elif tag == 'insert':
             # Words in output not in expected
-            out_segment = output_words[j1:j2]
-            text = ' '.join(w['text'] for w in out_segment)
-            start = out_segment[0].get('start', 0) if out_segment else 0
-            end = out_segment[-1].get('end', 0) if out_segment else 0
+            text = ' '.join(out_word_texts[j1:j2])
+            start = out_starts[j1] if j1 < j2 else 0
+            end = out_ends[j2-1] if j1 < j2 else 0
             extra_in_output.append({
                 'text': text,
                 'word_count': j2 - j1,
@@ -111,14 +140,12 @@ def main():
                 'out_idx': (j1, j2),
             })
         elif tag == 'replace':
-            exp_segment = expected_words[i1:i2]
-            out_segment = output_words[j1:j2]
-            exp_text = ' '.join(w['text'] for w in exp_segment)
-            out_text = ' '.join(w['text'] for w in out_segment)
-            exp_start = exp_segment[0].get('start', 0) if exp_segment else 0
-            exp_end = exp_segment[-1].get('end', 0) if exp_segment else 0
-            out_start = out_segment[0].get('start', 0) if out_segment else 0
-            out_end = out_segment[-1].get('end', 0) if out_segment else 0
+            exp_text = ' '.join(exp_word_texts[i1:i2])
+            out_text = ' '.join(out_word_texts[j1:j2])
+            exp_start = exp_starts[i1] if i1 < i2 else 0
+            exp_end = exp_ends[i2-1] if i1 < i2 else 0
+            out_start = out_starts[j1] if j1 < j2 else 0
+            out_end = out_ends[j2-1] if j1 < j2 else 0
             replacements.append({
                 'exp_text': exp_text,
                 'out_text': out_text,
@@ -141,16 +168,14 @@ def main():
         if r['exp_word_count'] == 1 and r['out_word_count'] == 1:
             exp_w = r['exp_text'].lower().strip('.,!?;:')
             out_w = r['out_text'].lower().strip('.,!?;:')
-            ratio = difflib.SequenceMatcher(None, exp_w, out_w).ratio()
-            if ratio > 0.6:
+            if _pair_similar(exp_w, out_w, 0.6):
                 asr_noise.append(r)
                 continue
         # Small replacements with similar text
         if r['exp_word_count'] <= 3 and r['out_word_count'] <= 3:
             exp_w = r['exp_text'].lower()
             out_w = r['out_text'].lower()
-            ratio = difflib.SequenceMatcher(None, exp_w, out_w).ratio()
-            if ratio > 0.5:
+            if _pair_similar(exp_w, out_w, 0.5):
                 asr_noise.append(r)
                 continue
         content_diffs.append(r)
@@ -171,158 +196,164 @@ def main():
     # Generate report
     os.makedirs('reports', exist_ok=True)
     
-    with open('reports/transcript_comparison.md', 'w') as f:
-        f.write("# Transcript Comparison Report\n\n")
-        f.write("## Summary\n\n")
-        f.write(f"| Metric | Value |\n")
-        f.write(f"|--------|-------|\n")
-        f.write(f"| Expected word count | {len(exp_texts)} |\n")
-        f.write(f"| Output word count | {len(out_texts)} |\n")
-        f.write(f"| Matching words | {total_matching} |\n")
-        f.write(f"| Match % (of expected) | {match_pct_exp:.1f}% |\n")
-        f.write(f"| Match % (of output) | {match_pct_out:.1f}% |\n")
-        f.write(f"| Words missing from output | {total_missing_words} |\n")
-        f.write(f"| Extra words in output | {total_extra_words} |\n")
-        f.write(f"| Words in replacements (expected side) | {total_replaced_exp} |\n")
-        f.write(f"| Words in replacements (output side) | {total_replaced_out} |\n")
-        f.write(f"| ASR noise replacements | {len(asr_noise)} ({total_asr_exp} exp words) |\n")
-        f.write(f"| Content difference replacements | {len(content_diffs)} ({total_content_exp} exp words) |\n")
-        f.write(f"\n")
-        
-        # Overall assessment
-        content_error_words = total_missing_words + total_extra_words + total_content_exp
-        content_error_pct = (content_error_words / len(exp_texts) * 100) if exp_texts else 0
-        asr_error_pct = (total_asr_exp / len(exp_texts) * 100) if exp_texts else 0
-        
-        f.write(f"### Overall Assessment\n\n")
-        f.write(f"- **Content error rate**: {content_error_pct:.1f}% ({content_error_words} words)\n")
-        f.write(f"- **ASR noise rate**: {asr_error_pct:.1f}% ({total_asr_exp} words)\n")
-        f.write(f"- **True content match**: {100 - content_error_pct:.1f}%\n\n")
-        
-        if content_error_pct <= 5:
-            f.write(f"✅ **Content match is GOOD** (< 5% error). Differences are primarily ASR transcription noise.\n\n")
-        else:
-            f.write(f"❌ **Content match needs attention** (> 5% error). Significant content differences found.\n\n")
-        
-        # Significant missing content
-        f.write(f"## Missing Content (in expected, not in output)\n\n")
-        f.write(f"Total: {len(missing_from_output)} gaps, {total_missing_words} words\n\n")
+    # The report is assembled in memory and written in one go
+    parts = []
+    parts.append("# Transcript Comparison Report\n\n")
+    parts.append("## Summary\n\n")
+    parts.append(f"| Metric | Value |\n")
+    parts.append(f"|--------|-------|\n")
+    parts.append(f"| Expected word count | {len(exp_texts)} |\n")
+    parts.append(f"| Output word count | {len(out_texts)} |\n")
+    parts.append(f"| Matching words | {total_matching} |\n")
+    parts.append(f"| Match % (of expected) | {match_pct_exp:.1f}% |\n")
+    parts.append(f"| Match % (of output) | {match_pct_out:.1f}% |\n")
+    parts.append(f"| Words missing from output | {total_missing_words} |\n")
+    parts.append(f"| Extra words in output | {total_extra_words} |\n")
+    parts.append(f"| Words in replacements (expected side) | {total_replaced_exp} |\n")
+    parts.append(f"| Words in replacements (output side) | {total_replaced_out} |\n")
+    parts.append(f"| ASR noise replacements | {len(asr_noise)} ({total_asr_exp} exp words) |\n")
+    parts.append(f"| Content difference replacements | {len(content_diffs)} ({total_content_exp} exp words) |\n")
+    parts.append(f"\n")
+    
+    # Overall assessment
+    content_error_words = total_missing_words + total_extra_words + total_content_exp
+    content_error_pct = (content_error_words / len(exp_texts) * 100) if exp_texts else 0
+    asr_error_pct = (total_asr_exp / len(exp_texts) * 100) if exp_texts else 0
+    
+    parts.append(f"### Overall Assessment\n\n")
+    parts.append(f"- **Content error rate**: {content_error_pct:.1f}% ({content_error_words} words)\n")
+    parts.append(f"- **ASR noise rate**: {asr_error_pct:.1f}% ({total_asr_exp} words)\n")
+    parts.append(f"- **True content match**: {100 - content_error_pct:.1f}%\n\n")
+    
+    if content_error_pct <= 5:
+        parts.append(f"✅ **Content match is GOOD** (< 5% error). Differences are primarily ASR transcription noise.\n\n")
+    else:
+        parts.append(f"❌ **Content match needs attention** (> 5% error). Significant content differences found.\n\n")
+    
+    # Significant missing content
+    parts.append(f"## Missing Content (in expected, not in output)\n\n")
+    parts.append(f"Total: {len(missing_from_output)} gaps, {total_missing_words} words\n\n")
+    if sig_missing:
+        parts.append(f"### Significant gaps (>3 words)\n\n")
+        for i, m in enumerate(sig_missing):
+            parts.append(f"**Gap {i+1}** ({m['word_count']} words) at expected timestamp {format_time(m['exp_start'])}-{format_time(m['exp_end'])}:\n")
+            text = m['text']
+            if len(text) > 300:
+                text = text[:300] + "..."
+            parts.append(f"> {text}\n\n")
+    else:
+        parts.append(f"No significant gaps found (all gaps ≤ 3 words — likely ASR noise).\n\n")
+    
+    # Significant extra content
+    parts.append(f"## Extra Content (in output, not in expected)\n\n")
+    parts.append(f"Total: {len(extra_in_output)} insertions, {total_extra_words} words\n\n")
+    if sig_extra:
+        parts.append(f"### Significant insertions (>3 words)\n\n")
+        for i, e in enumerate(sig_extra):
+            parts.append(f"**Insert {i+1}** ({e['word_count']} words) at output timestamp {format_time(e['out_start'])}-{format_time(e['out_end'])}:\n")
+            text = e['text']
+            if len(text) > 300:
+                text = text[:300] + "..."
+            parts.append(f"> {text}\n\n")
+    else:
+        parts.append(f"No significant insertions found (all insertions ≤ 3 words — likely ASR noise).\n\n")
+    
+    # Significant content replacements
+    parts.append(f"## Content Differences (replacements)\n\n")
+    parts.append(f"Total replacements: {len(replacements)}\n")
+    parts.append(f"- ASR noise (similar words): {len(asr_noise)}\n")
+    parts.append(f"- Content differences: {len(content_diffs)}\n\n")
+    
+    if sig_replace:
+        parts.append(f"### Significant content differences (>3 words)\n\n")
+        for i, r in enumerate(sig_replace):
+            parts.append(f"**Diff {i+1}** (exp: {r['exp_word_count']} words, out: {r['out_word_count']} words)\n")
+            parts.append(f"- Expected timestamp: {format_time(r['exp_start'])}-{format_time(r['exp_end'])}\n")
+            parts.append(f"- Output timestamp: {format_time(r['out_start'])}-{format_time(r['out_end'])}\n")
+            exp_text = r['exp_text']
+            out_text = r['out_text']
+            if len(exp_text) > 300:
+                exp_text = exp_text[:300] + "..."
+            if len(out_text) > 300:
+                out_text = out_text[:300] + "..."
+            parts.append(f"- Expected: > {exp_text}\n")
+            parts.append(f"- Output: > {out_text}\n\n")
+    
+    # ASR noise examples
+    parts.append(f"## ASR Noise Examples (first 20)\n\n")
+    for r in asr_noise[:20]:
+        parts.append(f"- `{r['exp_text']}` → `{r['out_text']}` (exp {format_time(r['exp_start'])})\n")
+    parts.append(f"\n")
+    
+    # Timeline analysis
+    parts.append(f"## Timeline Analysis\n\n")
+    parts.append(f"Checking for large time gaps or out-of-order content...\n\n")
+    
+    # Check if output words are in order time-wise
+    out_times = [w.get('start', 0) for w in output_words if w.get('start')]
+    # Backward jumps > 1 second, from consecutive (prev, curr) pairs
+    time_jumps = [(i, prev, curr, curr - prev)
+                  for i, (prev, curr) in enumerate(zip(out_times, out_times[1:]), 1)
+                  if curr - prev < -1000]
+    
+    if time_jumps:
+        parts.append(f"⚠️ Found {len(time_jumps)} backward time jumps in output:\n\n")
+        for idx, prev, curr, diff in time_jumps[:10]:
+            parts.append(f"- At word {idx}: {format_time(prev)} → {format_time(curr)} (jump: {diff/1000:.1f}s)\n")
+    else:
+        parts.append(f"✅ No backward time jumps — content appears to be in correct order.\n\n")
+    
+    # Summary of problem areas by timestamp
+    parts.append(f"## Problem Areas by Timestamp\n\n")
+    # Each list comes out of the opcode walk already in time order, so the
+    # timeline is a k-way merge. The per-list sorts only guard against small
+    # timestamp overlaps: on a sorted list they are a single linear pass, and
+    # together with merge's tie order they keep the stable full-sort order.
+    by_start = itemgetter(1)
+    missing_rows = sorted((('MISSING', m['exp_start'], m['exp_end'], m['word_count'], m['text'][:100])
+                           for m in sig_missing), key=by_start)
+    extra_rows = sorted((('EXTRA', e['out_start'], e['out_end'], e['word_count'], e['text'][:100])
+                         for e in sig_extra), key=by_start)
+    replace_rows = sorted((('DIFF', r['exp_start'], r['exp_end'],
+                            r['exp_word_count'] + r['out_word_count'],
+                            f"EXP: {r['exp_text'][:50]} → OUT: {r['out_text'][:50]}")
+                           for r in sig_replace), key=by_start)
+    all_problems = list(heapq.merge(missing_rows, extra_rows, replace_rows, key=by_start))
+    
+    if all_problems:
+        parts.append(f"| Type | Time | Words | Preview |\n")
+        parts.append(f"|------|------|-------|---------|\n")
+        for ptype, start, end, wc, preview in all_problems:
+            parts.append(f"| {ptype} | {format_time(start)}-{format_time(end)} | {wc} | {preview[:80]} |\n")
+    else:
+        parts.append(f"No significant problem areas found.\n")
+    
+    parts.append(f"\n## Root Cause Analysis\n\n")
+    if content_error_pct <= 5:
+        parts.append(f"The {content_error_pct:.1f}% content error rate is within acceptable bounds. ")
+        parts.append(f"The differences are primarily due to:\n\n")
+        parts.append(f"1. **ASR transcription variability**: Different audio encoding/quality leads to ")
+        parts.append(f"slightly different word recognition ({len(asr_noise)} instances)\n")
+        parts.append(f"2. **Minor word boundary differences**: Small insertions/deletions at phrase boundaries\n")
+        if sig_missing or sig_extra:
+            parts.append(f"3. **Small content variations**: {len(sig_missing)} missing segments and {len(sig_extra)} extra segments, ")
+            parts.append(f"which may represent minor timing differences in the cut points\n")
+    else:
+        parts.append(f"The {content_error_pct:.1f}% content error rate exceeds the 5% threshold. ")
+        parts.append(f"Investigation needed:\n\n")
         if sig_missing:
-            f.write(f"### Significant gaps (>3 words)\n\n")
-            for i, m in enumerate(sig_missing):
-                f.write(f"**Gap {i+1}** ({m['word_count']} words) at expected timestamp {format_time(m['exp_start'])}-{format_time(m['exp_end'])}:\n")
-                text = m['text']
-                if len(text) > 300:
-                    text = text[:300] + "..."
-                f.write(f"> {text}\n\n")
-        else:
-            f.write(f"No significant gaps found (all gaps ≤ 3 words — likely ASR noise).\n\n")
-        
-        # Significant extra content
-        f.write(f"## Extra Content (in output, not in expected)\n\n")
-        f.write(f"Total: {len(extra_in_output)} insertions, {total_extra_words} words\n\n")
+            parts.append(f"1. **Missing content**: {len(sig_missing)} significant gaps — segments from the expected ")
+            parts.append(f"output are not present in the actual output. This suggests the alignment algorithm ")
+            parts.append(f"is cutting segments that should be kept.\n")
         if sig_extra:
-            f.write(f"### Significant insertions (>3 words)\n\n")
-            for i, e in enumerate(sig_extra):
-                f.write(f"**Insert {i+1}** ({e['word_count']} words) at output timestamp {format_time(e['out_start'])}-{format_time(e['out_end'])}:\n")
-                text = e['text']
-                if len(text) > 300:
-                    text = text[:300] + "..."
-                f.write(f"> {text}\n\n")
-        else:
-            f.write(f"No significant insertions found (all insertions ≤ 3 words — likely ASR noise).\n\n")
-        
-        # Significant content replacements
-        f.write(f"## Content Differences (replacements)\n\n")
-        f.write(f"Total replacements: {len(replacements)}\n")
-        f.write(f"- ASR noise (similar words): {len(asr_noise)}\n")
-        f.write(f"- Content differences: {len(content_diffs)}\n\n")
-        
+            parts.append(f"2. **Extra content**: {len(sig_extra)} significant insertions — segments in the output ")
+            parts.append(f"that shouldn't be there. This suggests bad takes are not being properly removed.\n")
         if sig_replace:
-            f.write(f"### Significant content differences (>3 words)\n\n")
-            for i, r in enumerate(sig_replace):
-                f.write(f"**Diff {i+1}** (exp: {r['exp_word_count']} words, out: {r['out_word_count']} words)\n")
-                f.write(f"- Expected timestamp: {format_time(r['exp_start'])}-{format_time(r['exp_end'])}\n")
-                f.write(f"- Output timestamp: {format_time(r['out_start'])}-{format_time(r['out_end'])}\n")
-                exp_text = r['exp_text']
-                out_text = r['out_text']
-                if len(exp_text) > 300:
-                    exp_text = exp_text[:300] + "..."
-                if len(out_text) > 300:
-                    out_text = out_text[:300] + "..."
-                f.write(f"- Expected: > {exp_text}\n")
-                f.write(f"- Output: > {out_text}\n\n")
-        
-        # ASR noise examples
-        f.write(f"## ASR Noise Examples (first 20)\n\n")
-        for r in asr_noise[:20]:
-            f.write(f"- `{r['exp_text']}` → `{r['out_text']}` (exp {format_time(r['exp_start'])})\n")
-        f.write(f"\n")
-        
-        # Timeline analysis
-        f.write(f"## Timeline Analysis\n\n")
-        f.write(f"Checking for large time gaps or out-of-order content...\n\n")
-        
-        # Check if output words are in order time-wise
-        out_times = [w.get('start', 0) for w in output_words if w.get('start')]
-        time_jumps = []
-        for i in range(1, len(out_times)):
-            diff = out_times[i] - out_times[i-1]
-            if diff < -1000:  # Backward jump > 1 second
-                time_jumps.append((i, out_times[i-1], out_times[i], diff))
-        
-        if time_jumps:
-            f.write(f"⚠️ Found {len(time_jumps)} backward time jumps in output:\n\n")
-            for idx, prev, curr, diff in time_jumps[:10]:
-                f.write(f"- At word {idx}: {format_time(prev)} → {format_time(curr)} (jump: {diff/1000:.1f}s)\n")
-        else:
-            f.write(f"✅ No backward time jumps — content appears to be in correct order.\n\n")
-        
-        # Summary of problem areas by timestamp
-        f.write(f"## Problem Areas by Timestamp\n\n")
-        all_problems = []
-        for m in sig_missing:
-            all_problems.append(('MISSING', m['exp_start'], m['exp_end'], m['word_count'], m['text'][:100]))
-        for e in sig_extra:
-            all_problems.append(('EXTRA', e['out_start'], e['out_end'], e['word_count'], e['text'][:100]))
-        for r in sig_replace:
-            all_problems.append(('DIFF', r['exp_start'], r['exp_end'], 
-                               r['exp_word_count'] + r['out_word_count'],
-                               f"EXP: {r['exp_text'][:50]} → OUT: {r['out_text'][:50]}"))
-        
-        all_problems.sort(key=lambda x: x[1])
-        
-        if all_problems:
-            f.write(f"| Type | Time | Words | Preview |\n")
-            f.write(f"|------|------|-------|---------|\n")
-            for ptype, start, end, wc, preview in all_problems:
-                f.write(f"| {ptype} | {format_time(start)}-{format_time(end)} | {wc} | {preview[:80]} |\n")
-        else:
-            f.write(f"No significant problem areas found.\n")
-        
-        f.write(f"\n## Root Cause Analysis\n\n")
-        if content_error_pct <= 5:
-            f.write(f"The {content_error_pct:.1f}% content error rate is within acceptable bounds. ")
-            f.write(f"The differences are primarily due to:\n\n")
-            f.write(f"1. **ASR transcription variability**: Different audio encoding/quality leads to ")
-            f.write(f"slightly different word recognition ({len(asr_noise)} instances)\n")
-            f.write(f"2. **Minor word boundary differences**: Small insertions/deletions at phrase boundaries\n")
-            if sig_missing or sig_extra:
-                f.write(f"3. **Small content variations**: {len(sig_missing)} missing segments and {len(sig_extra)} extra segments, ")
-                f.write(f"which may represent minor timing differences in the cut points\n")
-        else:
-            f.write(f"The {content_error_pct:.1f}% content error rate exceeds the 5% threshold. ")
-            f.write(f"Investigation needed:\n\n")
-            if sig_missing:
-                f.write(f"1. **Missing content**: {len(sig_missing)} significant gaps — segments from the expected ")
-                f.write(f"output are not present in the actual output. This suggests the alignment algorithm ")
-                f.write(f"is cutting segments that should be kept.\n")
-            if sig_extra:
-                f.write(f"2. **Extra content**: {len(sig_extra)} significant insertions — segments in the output ")
-                f.write(f"that shouldn't be there. This suggests bad takes are not being properly removed.\n")
-            if sig_replace:
-                f.write(f"3. **Content divergence**: {len(sig_replace)} areas where output diverges significantly ")
-                f.write(f"from expected — may indicate wrong takes being selected.\n")
+            parts.append(f"3. **Content divergence**: {len(sig_replace)} areas where output diverges significantly ")
+            parts.append(f"from expected — may indicate wrong takes being selected.\n")
+    
+    with open('reports/transcript_comparison.md', 'w') as f:
+        f.write(''.join(parts))
     
     print(f"\nReport saved to reports/transcript_comparison.md")
     print(f"\n=== QUICK SUMMARY ===")
@@ -334,31 +365,30 @@ def main():
     print(f"Content error rate: {content_error_pct:.1f}%")
     
     # Save detailed data for further analysis
-    with open('reports/comparison_data.json', 'w') as f:
-        json.dump({
-            'summary': {
-                'expected_words': len(exp_texts),
-                'output_words': len(out_texts),
-                'matching_words': total_matching,
-                'match_pct_expected': match_pct_exp,
-                'match_pct_output': match_pct_out,
-                'missing_word_count': total_missing_words,
-                'extra_word_count': total_extra_words,
-                'asr_noise_count': len(asr_noise),
-                'content_diff_count': len(content_diffs),
-                'content_error_pct': content_error_pct,
-            },
-            'significant_missing': sig_missing,
-            'significant_extra': sig_extra,
-            'significant_replacements': [{
-                'exp_text': r['exp_text'],
-                'out_text': r['out_text'],
-                'exp_start': r['exp_start'],
-                'exp_end': r['exp_end'],
-                'out_start': r['out_start'],
-                'out_end': r['out_end'],
-            } for r in sig_replace],
-        }, f, indent=2, ensure_ascii=False)
+    save_json('reports/comparison_data.json', {
+        'summary': {
+            'expected_words': len(exp_texts),
+            'output_words': len(out_texts),
+            'matching_words': total_matching,
+            'match_pct_expected': match_pct_exp,
+            'match_pct_output': match_pct_out,
+            'missing_word_count': total_missing_words,
+            'extra_word_count': total_extra_words,
+            'asr_noise_count': len(asr_noise),
+            'content_diff_count': len(content_diffs),
+            'content_error_pct': content_error_pct,
+        },
+        'significant_missing': sig_missing,
+        'significant_extra': sig_extra,
+        'significant_replacements': [{
+            'exp_text': r['exp_text'],
+            'out_text': r['out_text'],
+            'exp_start': r['exp_start'],
+            'exp_end': r['exp_end'],
+            'out_start': r['out_start'],
+            'out_end': r['out_end'],
+        } for r in sig_replace],
+    }, ensure_ascii=False)
 
 if __name__ == "__main__":
     main()
@@ -3,25 +3,36 @@
 Deep dive analysis: Why are those 5 passages different?
 Let's find them in the raw transcription and understand what happened.
 """
-import json
-import re
 import difflib
+from concurrent.futures import ThreadPoolExecutor
 
-def normalize_word(text):
-    return re.sub(r'[^a-z0-9àâäéèêëïîôùûüÿçœæ]', '', text.lower())
+import _paths  # noqa: F401
+from json_utils import load_json
+from word_norm import normalize_word, normalize_words
 
-def load_trans(path):
-    with open(path) as f:
-        return json.load(f)
+# id(words) -> (words, SequenceMatcher with the normalized words as seq2)
+_matchers = {}
+
+def matcher_for(words):
+    """
+    SequenceMatcher over a word list, built once per list: set_seq1 keeps the
+    seq2 index (b2j), so each passage search only swaps in the passage.
+    """
+    entry = _matchers.get(id(words))
+    if entry is None or entry[0] is not words:
+        sm = difflib.SequenceMatcher(None, autojunk=False)
+        sm.set_seq2(normalize_words(w['text'] for w in words))
+        entry = _matchers[id(words)] = (words, sm)
+    return entry[1]
 
 def find_passage_in_raw(passage_words, raw_words):
     """Find where a passage from output/expected appears in raw."""
     norm_passage = [normalize_word(w) for w in passage_words]
-    norm_raw = [normalize_word(w['text']) for w in raw_words]
     
     # Use difflib to find the best match
-    sm = difflib.SequenceMatcher(None, norm_passage, norm_raw, autojunk=False)
-    match = sm.find_longest_match(0, len(norm_passage), 0, len(norm_raw))
+    sm = matcher_for(raw_words)
+    sm.set_seq1(norm_passage)
+    match = sm.find_longest_match(0, len(norm_passage), 0, len(sm.b))
     
     if match.size >= len(norm_passage) * 0.8:  # At least 80% match
         return match.b, match.b + match.size
@@ -50,18 +61,19 @@ def main():
     print("=" * 100)
     print()
     
-    # Load all transcriptions
-    raw = load_trans('raw_transcription.json')
-    output = load_trans('output_transcription.json')
-    expected = load_trans('expected_transcription.json')
+    # Load all transcriptions; the files are independent, so one thread each
+    # lets a file's read overlap with the previous one's parse
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        raw, output, expected = ex.map(load_json, ['raw_transcription.json',
+                                                    'output_transcription.json',
+                                                    'expected_transcription.json'])
     
     raw_words = raw['words']
     output_words = output['words']
     expected_words = expected['words']
     
     # Load the detailed analysis
-    with open('reports/detailed_analysis.json') as f:
-        analysis = json.load(f)
+    analysis = load_json('reports/detailed_analysis.json')
     
     print("PART 1: EXTRA CONTENT IN OUTPUT (should have been removed)")
     print("=" * 100)
@@ -145,8 +157,8 @@ def main():
     print("=" * 100)
     print()
     
-    raw_texts = [normalize_word(w['text']) for w in raw_words]
-    exp_texts = [normalize_word(w['text']) for w in expected_words]
+    raw_texts = normalize_words(w['text'] for w in raw_words)
+    exp_texts = normalize_words(w['text'] for w in expected_words)
     
     sm = difflib.SequenceMatcher(None, raw_texts, exp_texts, autojunk=False)
     blocks = sm.get_matching_blocks()
@@ -3,12 +3,11 @@
 Quick analysis without full transcription:
 Compare segments.json with expected to estimate match quality.
 """
-import json
 import difflib
-import re
 
-def normalize_word(text):
-    return re.sub(r'[^a-z0-9àâäéèêëïîôùûüÿçœæ]', '', text.lower())
+import _paths  # noqa: F401
+from json_utils import load_json, save_json
+from word_norm import normalize_words
 
 def main():
     print("=" * 80)
@@ -17,14 +16,9 @@ def main():
     print()
     
     # Load data
-    with open('reports/segments.json') as f:
-        segments = json.load(f)
-    
-    with open('raw_transcription.json') as f:
-        raw_trans = json.load(f)
-    
-    with open('expected_transcription.json') as f:
-        exp_trans = json.load(f)
+    segments = load_json('reports/segments.json')
+    raw_trans = load_json('raw_transcription.json')
+    exp_trans = load_json('expected_transcription.json')
     
     raw_words = raw_trans['words']
     exp_words = exp_trans['words']
@@ -39,8 +33,8 @@ def main():
     output_words_from_raw = [raw_words[i] for i in sorted(output_word_indices)]
     
     # Normalize for comparison
-    output_texts = [normalize_word(w['text']) for w in output_words_from_raw]
-    exp_texts = [normalize_word(w['text']) for w in exp_words]
+    output_texts = normalize_words(w['text'] for w in output_words_from_raw)
+    exp_texts = normalize_words(w['text'] for w in exp_words)
     
     # Filter empty
     output_texts = [w for w in output_texts if w]
@@ -96,8 +90,7 @@ def main():
         'duration_ratio': total_duration / expected_duration
     }
     
-    with open('reports/quick_analysis.json', 'w') as f:
-        json.dump(report, f, indent=2)
+    save_json('reports/quick_analysis.json', report)
     
     print()
     print("Report saved to: reports/quick_analysis.json")
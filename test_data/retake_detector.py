@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 """Retake Detection FINAL - For porting to Rust."""
-import json, re, difflib
+import re, difflib
 from collections import defaultdict
+import _paths  # noqa: F401
+from json_utils import load_json
 
 def load_data():
-    with open('raw_transcription.json') as f: raw = json.load(f)
-    with open('expected_transcription.json') as f: exp = json.load(f)
+    raw, exp = load_json('raw_transcription.json'), load_json('expected_transcription.json')
     return raw['words'], exp['words'], raw.get('text', ''), exp.get('text', '')
 
 def norm(s): return re.sub(r'[^a-z0-9àâäéèêëïîôùûüçœæ]', '', s.lower())
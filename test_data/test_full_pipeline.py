@@ -5,6 +5,8 @@ Compares final output against expected_transcription.json
 """
 import json, re, sys, os, difflib, unicodedata, time
 from collections import defaultdict
+import _paths  # noqa: F401
+from json_utils import load_json
 
 # ──────────────────────────────────────────────────────────
 # Utilities (shared with test_pipeline.py)
@@ -50,8 +52,7 @@ def is_truncated(text):
 # ──────────────────────────────────────────────────────────
 
 def load_data():
-    with open('raw_transcription.json') as f: raw = json.load(f)
-    with open('expected_transcription.json') as f: exp = json.load(f)
+    raw, exp = load_json('raw_transcription.json'), load_json('expected_transcription.json')
     return raw['words'], exp['words'], raw.get('text', ''), exp.get('text', '')
 
 def chunk_words(words, gap_ms=500):
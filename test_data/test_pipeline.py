@@ -4,8 +4,10 @@ Retake detection test — Phase 1 algorithmic detection.
 Goal: maximize true removals while keeping FP ≤ 5.
 Then Phase 2 (Claude) handles the rest.
 """
-import json, re, difflib, sys, unicodedata
+import re, difflib, sys, unicodedata
 from collections import defaultdict
+import _paths  # noqa: F401
+from json_utils import load_json
 
 # ──────────────────────────────────────────────────────────
 # Utilities  
@@ -51,8 +53,7 @@ def is_truncated(text):
 # ──────────────────────────────────────────────────────────
 
 def load_data():
-    with open('raw_transcription.json') as f: raw = json.load(f)
-    with open('expected_transcription.json') as f: exp = json.load(f)
+    raw, exp = load_json('raw_transcription.json'), load_json('expected_transcription.json')
     return raw['words'], exp['words'], raw.get('text', ''), exp.get('text', '')
 
 def chunk_words(words, gap_ms=500):
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Word normalization shared by deep_analysis.py and quick_analysis.py:
+lowercase, keep only letters (French accents included) and digits.
+"""
+import re
+
+# Characters normalize_word strips, compiled once instead of per word
+_NORM_RE = re.compile(r'[^a-z0-9àâäéèêëïîôùûüÿçœæ]')
+
+def normalize_word(text):
+    return _NORM_RE.sub('', text.lower())
+
+# Same class plus the NUL used to join words in normalize_words
+_NORM_JOINED_RE = re.compile(r'[^a-z0-9àâäéèêëïîôùûüÿçœæ\x00]')
+
+def normalize_words(texts):
+    """
+    [normalize_word(t) for t in texts], done as one lower() and one regex pass
+    over the NUL-joined texts instead of one of each per word.
+    """
+    texts = list(texts)
+    joined = '\x00'.join(texts)
+    if not texts or joined.count('\x00') != len(texts) - 1:
+        # Empty list, or a text that itself contains NUL
+        return [normalize_word(t) for t in texts]
+    return _NORM_JOINED_RE.sub('', joined.lower()).split('\x00')